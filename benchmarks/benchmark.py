@@ -0,0 +1,260 @@
+# -*- coding=utf-8 -*-
+
+# ------------------------------------------------------------------
+# File Name:        benchmark.py
+# Author:           agent
+# Version:          1.0.0
+# Created:          2026/10/17
+# Description:      This is a script to benchmark the orchestration
+#                   of EVOMIA with the fake abaqus stand-in, across
+#                   batch sizes, sample counts and template sizes.
+# Function List:    make_workspace, run_case, compare, main
+# History:
+#       <author>        <version>       <time>      <desc>
+#       agent           1.0.0           2026/10/17  Created file
+# ------------------------------------------------------------------
+
+import os
+import sys
+import json
+import glob
+import time
+import shutil
+import argparse
+import itertools
+import tempfile
+import subprocess as sp
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from utils.tracer import summarize
+from fake_abaqus import model
+
+# Run EVOMIA in the workspace with the options given as json
+RUNNER = '''
+import sys
+import json
+sys.path.insert(0, '.')
+from evomia import EVOMIA
+EVOMIA(**json.loads(sys.argv[1])).run()
+'''
+
+def make_workspace(samples:int,
+                   template_size:int,
+                   seed:int=0) -> str:
+    '''
+    Make a workspace with a copy of EVOMIA, a padded template and ground truth
+    The ground truth is generated by the analytic model of the fake abaqus.
+
+    Args:
+        samples: int, number of ground truth samples
+        template_size: int, number of comment lines padded into the part definition
+        seed: int, random seed of the ground truth
+
+    Returns:
+        workspace: str, workspace directory
+    '''
+
+    workspace = tempfile.mkdtemp(prefix='evomia_benchmark_')
+    shutil.copy(os.path.join(ROOT, 'evomia.py'), workspace)
+    shutil.copytree(os.path.join(ROOT, 'utils'), os.path.join(workspace, 'utils'),
+                    ignore=shutil.ignore_patterns('__pycache__', 'abaqus.rpy*'))
+    for folder in ['templates/inp', 'templates/material', 'templates/output', 'data/ground_truth', 'bin']:
+        os.makedirs(os.path.join(workspace, folder))
+    shutil.copy(os.path.join(ROOT, 'templates/material/linear.json'), os.path.join(workspace, 'templates/material'))
+    shutil.copy(os.path.join(ROOT, 'templates/output/integrated_force.json'), os.path.join(workspace, 'templates/output'))
+
+    # Pad the part definition, which is model data shared by all samples
+    with open(os.path.join(ROOT, 'templates/inp/cylinder_linear.inp'), 'r') as f:
+        template = f.read()
+    template = template.replace('*End Part', '** padding\n' * template_size + '*End Part', 1)
+    with open(os.path.join(workspace, 'templates/inp/bench_linear.inp'), 'w') as f:
+        f.write(template)
+
+    # Ground truth of the true parameters
+    rng = np.random.default_rng(seed)
+    params = {'youngs_modulus': 0.2, 'poisson_ratio': 0.42}
+    ground_truth = dict()
+    for num in range(samples):
+        inputs = {key: float(np.round(rng.uniform(-10, 10), 3)) for key in ['u1', 'u2', 'u3']}
+        inputs.update({key: float(np.round(rng.uniform(-0.2, 0.2), 3)) for key in ['ur1', 'ur2', 'ur3']})
+        ground_truth[str(num)] = {'input': inputs, 'output': model(params, inputs)}
+    with open(os.path.join(workspace, 'data/ground_truth/bench_linear_integrated_force.json'), 'w') as f:
+        json.dump(ground_truth, f, indent=4)
+
+    # Put the fake abaqus on the path
+    with open(os.path.join(workspace, 'bin', 'abaqus'), 'w') as f:
+        f.write('#!/bin/sh\nexec "%s" "%s" "$@"\n' % (sys.executable,
+                                                      os.path.join(ROOT, 'benchmarks', 'fake_abaqus.py')))
+    os.chmod(os.path.join(workspace, 'bin', 'abaqus'), 0o755)
+
+    return workspace
+
+def run_case(case:dict,
+             args:argparse.Namespace) -> dict:
+    '''
+    Run one benchmark case
+
+    Args:
+        case: dict, mode, batch size, samples and template size
+        args: argparse.Namespace, benchmark options
+
+    Returns:
+        metrics: dict, throughput, core utilization and stage latencies
+    '''
+
+    workspace = make_workspace(case['samples'], case['template size'], seed=args.seed)
+    options = {'obj_name': 'bench',
+               'material': 'linear',
+               'output': 'integrated_force',
+               'max_trials': args.trials,
+               'max_time': args.max_time,
+               'err_threshold': 0.0,
+               'batch_size': case['batch size'],
+               'cpus': args.cpus,
+               'cpu_budget': case['batch size'] * args.cpus,
+               'export_jobs': args.export_jobs,
+               'export_server': not args.no_export_server,
+               'export_timeout': args.export_timeout,
+               'compiled': not args.no_compiled,
+               'packed': args.packed,
+               'auto_tune': args.auto_tune,
+               'refine': args.refine,
+               'parallel': case['mode'] == 'parallel',
+               'cache_path': None,
+               'trace': True}
+    env = dict(os.environ)
+    env['PATH'] = os.path.join(workspace, 'bin') + os.pathsep + env['PATH']
+    env['FAKE_ABAQUS_SOLVE_TIME'] = str(args.solve_time)
+    env['FAKE_ABAQUS_SOLVE_JITTER'] = str(args.solve_jitter)
+    env['FAKE_ABAQUS_SOLVE_SERIAL_FRACTION'] = str(args.solve_serial_fraction)
+    env['FAKE_ABAQUS_SOLVE_FAIL_RATE'] = str(args.solve_fail_rate)
+    env['FAKE_ABAQUS_SOLVE_HANG_RATE'] = str(args.solve_hang_rate)
+    env['FAKE_ABAQUS_EXPORT_STARTUP'] = str(args.export_startup)
+    env['FAKE_ABAQUS_EXPORT_TIME'] = str(args.export_time)
+    env['FAKE_ABAQUS_EXPORT_FAIL_RATE'] = str(args.export_fail_rate)
+    env['FAKE_ABAQUS_EXPORT_HANG_RATE'] = str(args.export_hang_rate)
+
+    start_time = time.time()
+    with open(os.path.join(workspace, 'benchmark.log'), 'w') as log:
+        returncode = sp.call([sys.executable, '-c', RUNNER, json.dumps(options)],
+                             cwd=workspace,
+                             env=env,
+                             stdout=log,
+                             stderr=sp.STDOUT)
+    wall_time = time.time() - start_time
+
+    traces = glob.glob(os.path.join(workspace, 'data', 'bench_linear_integrated_force_*', 'trace.jsonl'))
+    metrics = {'case': case, 'returncode': returncode, 'wall time': wall_time}
+    if traces:
+        summary = summarize(traces[0])
+        solve = summary['stages'].get('solve', {'count': 0, 'mean': 0.0})
+        metrics.update({'trials per hour': summary.get('trials per hour', 0.0),
+                        'samples per hour': summary.get('samples per hour', 0.0),
+                        'core utilization': solve['count'] * solve['mean'] * args.cpus
+                                            / max(summary.get('elapsed', 0.0) * case['batch size'] * args.cpus, 1e-9),
+                        'exit codes': summary['exit codes'],
+                        'stages': summary['stages']})
+    if args.keep:
+        metrics['workspace'] = workspace
+    else:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    return metrics
+
+def compare(results:list,
+            baseline:list,
+            tolerance:float) -> list:
+    '''
+    Compare throughput with a baseline
+
+    Args:
+        results: list, metrics of the cases
+        baseline: list, metrics of the baseline cases
+        tolerance: float, allowed relative drop of trials per hour
+
+    Returns:
+        regressions: list, (case, trials per hour, baseline trials per hour) of the regressed cases
+    '''
+
+    reference = {json.dumps(metrics['case'], sort_keys=True): metrics for metrics in baseline}
+    regressions = list()
+    for metrics in results:
+        base = reference.get(json.dumps(metrics['case'], sort_keys=True))
+        if base is None or 'trials per hour' not in base:
+            continue
+        if metrics.get('trials per hour', 0.0) < base['trials per hour'] * (1 - tolerance):
+            regressions.append((metrics['case'], metrics.get('trials per hour', 0.0), base['trials per hour']))
+
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the EVOMIA orchestration with a fake abaqus.')
+    parser.add_argument('--modes', nargs='+', default=['sequential', 'parallel'], choices=['sequential', 'parallel'])
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[2, 4])
+    parser.add_argument('--samples', nargs='+', type=int, default=[4])
+    parser.add_argument('--template-sizes', nargs='+', type=int, default=[0])
+    parser.add_argument('--trials', type=int, default=8)
+    parser.add_argument('--max-time', type=int, default=3600)
+    parser.add_argument('--cpus', type=int, default=1)
+    parser.add_argument('--export-jobs', type=int, default=2)
+    parser.add_argument('--no-export-server', action='store_true')
+    parser.add_argument('--no-compiled', action='store_true')
+    parser.add_argument('--packed', action='store_true', help='pack the samples of a trial into one job')
+    parser.add_argument('--auto-tune', action='store_true', help='tune the cpus per job from the solve times')
+    parser.add_argument('--refine', action='store_true', help='refine with Levenberg-Marquardt when CMA-ES stagnates')
+    parser.add_argument('--solve-time', type=float, default=0.2)
+    parser.add_argument('--solve-jitter', type=float, default=0.05)
+    parser.add_argument('--solve-serial-fraction', type=float, default=1.0)
+    parser.add_argument('--solve-fail-rate', type=float, default=0.0)
+    parser.add_argument('--solve-hang-rate', type=float, default=0.0)
+    parser.add_argument('--export-startup', type=float, default=1.0)
+    parser.add_argument('--export-time', type=float, default=0.05)
+    parser.add_argument('--export-fail-rate', type=float, default=0.0)
+    parser.add_argument('--export-hang-rate', type=float, default=0.0)
+    parser.add_argument('--export-timeout', type=float, default=600)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, default=None, help='json file to save the results to')
+    parser.add_argument('--baseline', type=str, default=None, help='json file of previous results to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative drop of trials per hour')
+    parser.add_argument('--keep', action='store_true', help='keep the workspaces')
+    args = parser.parse_args()
+
+    print('\033[7m{:=^101s}\033[0m'.format(' EVOMIA BENCHMARK'))
+    print('{:<12s}{:>7s}{:>9s}{:>10s}{:>11s}{:>12s}{:>7s}{:>11s}{:>11s}{:>11s}{:>11s}'.format(
+        'Mode', 'Batch', 'Samples', 'Template', 'Trials/h', 'Samples/h', 'Util',
+        'Wait p50', 'Queue p50', 'Solve p50', 'Export p50'))
+    results = list()
+    for mode, batch_size, samples, template_size in itertools.product(args.modes, args.batch_sizes,
+                                                                       args.samples, args.template_sizes):
+        case = {'mode': mode, 'batch size': batch_size, 'samples': samples, 'template size': template_size}
+        metrics = run_case(case, args)
+        results.append(metrics)
+        if 'stages' not in metrics:
+            print('\033[31mERROR: CASE FAILED !!!\033[0m', case, 'Exit code:', metrics['returncode'])
+            continue
+        p50 = {stage: stats['p50'] for stage, stats in metrics['stages'].items()}
+        print('{:<12s}{:>7d}{:>9d}{:>10d}{:>11.1f}{:>12.1f}{:>7.2f}{:>11.3f}{:>11.3f}{:>11.3f}{:>11.3f}'.format(
+            mode, batch_size, samples, template_size, metrics['trials per hour'], metrics['samples per hour'],
+            metrics['core utilization'], p50.get('wait', 0.0), p50.get('queue', 0.0),
+            p50.get('solve', 0.0), p50.get('export', 0.0)))
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print('Results:', args.output)
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for case, trials_per_hour, base in regressions:
+            print('\033[31mREGRESSION:\033[0m', case, 'Trials per hour: %.1f (baseline %.1f)' % (trials_per_hour, base))
+        if regressions:
+            return 1
+        print('No regression')
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
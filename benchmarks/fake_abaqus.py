@@ -0,0 +1,177 @@
+# -*- coding=utf-8 -*-
+
+# ------------------------------------------------------------------
+# File Name:        fake_abaqus.py
+# Author:           agent
+# Version:          1.3.0
+# Created:          2026/10/17
+# Description:      This is a stand-in for the abaqus command to
+#                   benchmark the orchestration without Abaqus.
+#                   Solves the linear cylinder with an analytic model.
+# Function List:    model, solve, export, main
+# History:
+#       <author>        <version>       <time>      <desc>
+#       agent           1.0.0           2026/10/17  Created file
+#       agent           1.1.0           2026/10/17  Add multi-step input files
+#       agent           1.2.0           2026/10/17  Scale solve time with cpus
+#       agent           1.3.0           2026/10/17  Add hanging solves and failure messages
+# ------------------------------------------------------------------
+
+import os
+import re
+import sys
+import json
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils'))
+from odb_protocol import serve, load_params, write_result, stand_in_export
+
+# Latency in seconds and failure rates, set by the benchmark through the environment
+SOLVE_TIME = float(os.environ.get('FAKE_ABAQUS_SOLVE_TIME', '0.2'))
+SOLVE_JITTER = float(os.environ.get('FAKE_ABAQUS_SOLVE_JITTER', '0.1'))
+SOLVE_SERIAL_FRACTION = float(os.environ.get('FAKE_ABAQUS_SOLVE_SERIAL_FRACTION', '1.0'))
+SOLVE_FAIL_RATE = float(os.environ.get('FAKE_ABAQUS_SOLVE_FAIL_RATE', '0.0'))
+SOLVE_HANG_RATE = float(os.environ.get('FAKE_ABAQUS_SOLVE_HANG_RATE', '0.0'))
+EXPORT_STARTUP = float(os.environ.get('FAKE_ABAQUS_EXPORT_STARTUP', '1.0'))
+EXPORT_TIME = float(os.environ.get('FAKE_ABAQUS_EXPORT_TIME', '0.05'))
+EXPORT_FAIL_RATE = float(os.environ.get('FAKE_ABAQUS_EXPORT_FAIL_RATE', '0.0'))
+EXPORT_HANG_RATE = float(os.environ.get('FAKE_ABAQUS_EXPORT_HANG_RATE', '0.0'))
+
+def model(params:dict,
+          inputs:dict) -> dict:
+    '''
+    Analytic model of the linear cylinder
+    Forces and moments are linear in the displacements and rotations of the
+    reference point, with the shear and bulk moduli as stiffness.
+
+    Args:
+        params: dict, material parameters, youngs_modulus and poisson_ratio
+        inputs: dict, displacements u1, u2, u3 and rotations ur1, ur2, ur3
+
+    Returns:
+        outputs: dict, integrated forces SOF1-3 and moments SOM1-3
+    '''
+
+    shear = params['youngs_modulus'] / (2 * (1 + params['poisson_ratio']))
+    bulk = params['youngs_modulus'] / (3 * (1 - 2 * params['poisson_ratio']))
+
+    return {'SOF1': -10 * shear * inputs['u1'],
+            'SOF2': -10 * shear * inputs['u2'],
+            'SOF3': -10 * bulk * inputs['u3'],
+            'SOM1': -1000 * shear * inputs['ur1'],
+            'SOM2': -1000 * shear * inputs['ur2'],
+            'SOM3': -1000 * bulk * inputs['ur3']}
+
+def solve(job:str,
+          cpus:int=1) -> int:
+    '''
+    Solve an input file and write the placeholder odb file
+    A multi-step input file writes the outputs of every step by step name.
+
+    Args:
+        job: str, job name, the input file is job + '.inp' in the working directory
+        cpus: int, number of cpus, only the parallel fraction of the solve time scales with it
+
+    Returns:
+        returncode: int, exit code
+    '''
+
+    with open(job + '.inp', 'r') as f:
+        deck = f.read()
+    for include in re.findall(r'^\*Include, input=(.+)$', deck, re.M | re.I):
+        if not os.path.exists(include.strip()):
+            print('ERROR: INCLUDE FILE NOT FOUND')
+            return 1
+    if random.random() < SOLVE_HANG_RATE:
+        # Diverging analysis, never finishes
+        time.sleep(1e6)
+    time.sleep(max(0.0, random.gauss(SOLVE_TIME, SOLVE_JITTER))
+               * (SOLVE_SERIAL_FRACTION + (1 - SOLVE_SERIAL_FRACTION) / cpus))
+
+    if random.random() < SOLVE_FAIL_RATE:
+        # Aborted analysis, the odb holds no outputs
+        odb = {'status': 'aborted'}
+        returncode = 1
+        with open(job + '.msg', 'w') as f:
+            f.write(' ***ERROR: TOO MANY ATTEMPTS MADE FOR THIS INCREMENT\n\n')
+        with open(job + '.sta', 'w') as f:
+            f.write(' THE ANALYSIS HAS NOT BEEN COMPLETED\n')
+    else:
+        elastic = re.search(r'^\*Elastic\s*\n\s*([^,\s]+),\s*([^,\s]+)', deck, re.M | re.I)
+        params = {'youngs_modulus': float(elastic.group(1)), 'poisson_ratio': float(elastic.group(2))}
+        # Boundary conditions carry over from step to step
+        inputs = dict()
+        steps = dict()
+        for name, block in re.findall(r'^\*Step,[^\n]*?name=([^,\n]+)[^\n]*\n(.*?)^\*End Step',
+                                      deck, re.M | re.I | re.S):
+            for dof, value in re.findall(r'^RP_set, (\d), \d, (\S+)', block, re.M):
+                inputs[['u1', 'u2', 'u3', 'ur1', 'ur2', 'ur3'][int(dof) - 1]] = float(value)
+            steps[name.strip()] = model(params, inputs)
+        odb = list(steps.values())[0] if len(steps) == 1 else {'steps': steps}
+        returncode = 0
+    with open(job + '.odb', 'w') as f:
+        json.dump(odb, f)
+
+    return returncode
+
+def export(path:str,
+           file:str,
+           params:dict) -> dict:
+    '''
+    Export result from a placeholder odb file
+
+    Args:
+        path: str, odb path
+        file: str, odb file name
+        params: dict, output parameters
+
+    Returns:
+        result: dict, exported result
+    '''
+
+    time.sleep(EXPORT_TIME)
+    if random.random() < EXPORT_HANG_RATE:
+        # Hung CAE kernel, never answers
+        time.sleep(1e6)
+    if random.random() < EXPORT_FAIL_RATE:
+        raise RuntimeError('ERROR: EXPORT FAILED')
+
+    return stand_in_export(path, file, params)
+
+def main(args:list) -> int:
+    '''
+    Run an abaqus command line
+
+    Args:
+        args: list, command line arguments, e.g.
+            job=name cpus=4 int
+            cae noGUI=odb_exporter.py -- path file output
+            cae noGUI=odb_exporter.py -- --server port_file
+
+    Returns:
+        returncode: int, exit code
+    '''
+
+    if args and args[0].startswith('job='):
+        cpus = [int(arg[len('cpus='):]) for arg in args if arg.startswith('cpus=')]
+        return solve(args[0][len('job='):], cpus[0] if cpus else 1)
+    elif args and args[0] == 'cae':
+        # CAE startup is paid once per export job, or once per export server
+        time.sleep(EXPORT_STARTUP)
+        if args[-2] == '--server':
+            serve(export, args[-1])
+            return 0
+        path, file, output = args[-3:]
+        try:
+            write_result(path, file, export(path, file, load_params(output, dict())))
+        except Exception as e:
+            print(e)
+            return 1
+        return 0
+    print('ERROR: COMMAND NOT SUPPORTED')
+
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+import json
+import threading
+import optuna
+from utils import JobScheduler
+from evomia import EVOMIA
+
+class Campaign:
+    def __init__(self,
+                 studies:list,
+                 cpu_budget:int=None,
+                 max_jobs:int=None,
+                 **options) -> None:
+        '''
+        Campaign class
+        This class is designed to run several studies, e.g. one per object, material and output,
+        from one process on one pool of solver jobs. The pool is shared fairly between the studies
+        in proportion to their priorities, and the cpus of a study waiting for its trials or
+        finished early go to the others at once.
+
+        Args:
+            studies: list, studies as (obj_name, material, output) tuples, or as dicts of EVOMIA arguments
+                with at least obj_name, material and output, e.g. priority, batch_size, cpu_budget,
+                max_trials and max_time as the budget of the study, and label to tell apart studies
+                on the same object, material and output
+            cpu_budget: int, total number of cpus of the solver pool, default all cpus
+            max_jobs: int, maximum number of concurrent solver jobs of the pool, default unlimited
+            options: EVOMIA arguments shared by all studies, overridden by those of a study
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: if the studies are empty or not unique
+        '''
+
+        studies = [dict(zip(['obj_name', 'material', 'output'], study)) if isinstance(study, (tuple, list))
+                   else dict(study) for study in studies]
+
+        # Check if the input parameters are valid
+        try:
+            if not studies:
+                raise ValueError('\033[31mERROR: STUDIES ARE EMPTY !!!\033[0m')
+            if not all({'obj_name', 'material', 'output'} <= set(study) for study in studies):
+                raise ValueError('\033[31mERROR: STUDY NEEDS OBJ_NAME, MATERIAL AND OUTPUT !!!\033[0m')
+            names = [study.get('study_name') or study.get('label')
+                     or (study['obj_name'], study['material'], study['output']) for study in studies]
+            if len(set(names)) != len(names):
+                raise ValueError('\033[31mERROR: STUDIES ARE NOT UNIQUE !!!\033[0m')
+        except ValueError as e:
+            print(e)
+            sys.exit()
+
+        print('\033[7m{:=^70s}\033[0m'.format(' CAMPAIGN '))
+        self.scheduler = JobScheduler(cpu_budget=cpu_budget,
+                                      max_jobs=max_jobs)
+        print('CPU budget:', self.scheduler.cpu_budget)
+        print('Maximum jobs:', self.scheduler.max_jobs)
+        print('Studies:', len(studies))
+
+        # Studies are created one by one, so that their input errors stop the campaign before it starts
+        self.opts = list()
+        for study in studies:
+            study = dict(options, **study)
+            # Without a batch size of its own, a study may take over the whole pool
+            study.setdefault('batch_size', max_jobs if max_jobs is not None else
+                             max(1, self.scheduler.cpu_budget // study.get('cpus', 4)))
+            self.opts.append(EVOMIA(scheduler=self.scheduler,
+                                    progress=False,
+                                    **study))
+        self.results = dict()
+
+    def _run(self,
+             opt:EVOMIA) -> None:
+        start_time = time.time()
+        try:
+            opt.run()
+            status = 'finished'
+        except (Exception, SystemExit) as e:
+            print('\033[31mERROR: STUDY', opt.opt_name, 'FAILED:', repr(e), '\033[0m')
+            status = 'failed'
+        best_trial = None
+        if opt.study is not None:
+            try:
+                best_trial = opt.best_trial(opt.study) or opt.study.best_trial
+            except ValueError:
+                pass
+        self.results[opt.opt_name] = {'Status': status,
+                                      'Priority': opt.priority,
+                                      'Trials': opt.count_trials(opt.study) if opt.study is not None else 0,
+                                      'Error': best_trial.value if best_trial is not None else None,
+                                      'Best parameters': best_trial.params if best_trial is not None else None,
+                                      'Elapsed': time.time() - start_time}
+
+    def run(self) -> dict:
+        '''
+        Run all studies concurrently, one thread each
+
+        Returns:
+            results: dict, status, best error and parameters and elapsed time of every study
+        '''
+
+        print('{:-^70s}'.format(' CAMPAIGN STARTED '))
+        # Create the tables of the databases once, the studies would race for them
+        for storage in set(opt.storage for opt in self.opts if '://' in opt.storage):
+            optuna.storages.RDBStorage(storage)
+        threads = [threading.Thread(target=self._run,
+                                    args=(opt,),
+                                    name=opt.opt_name,
+                                    daemon=True) for opt in self.opts]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                # Join with a timeout, so that the main thread still receives KeyboardInterrupt
+                while thread.is_alive():
+                    thread.join(timeout=1.0)
+        finally:
+            # The study threads are daemons, kill the solver jobs left by them on exit
+            self.scheduler.shutdown()
+
+        print('{:-^70s}'.format(' CAMPAIGN FINISHED '))
+        for name, result in self.results.items():
+            print(name, 'Status:', result['Status'], 'Error:', result['Error'],
+                  'Elapsed: %.1f s' % result['Elapsed'])
+
+        # Save results
+        os.makedirs('data', exist_ok=True)
+        with open('data/campaign' + time.strftime('_%Y%m%d-%H%M%S') + '.json', 'w') as f:
+            json.dump(self.results,
+                      f,
+                      sort_keys=True,
+                      indent=4,
+                      separators=(',', ': '))
+
+        return self.results
+
+if __name__ == '__main__':
+    # Parameters
+    studies = [{'obj_name': 'cylinder', 'material': 'linear', 'output': 'integrated_force', 'priority': 2.0},
+               {'obj_name': 'cylinder', 'material': 'linear', 'output': 'integrated_force', 'priority': 1.0,
+                'err_norm': 'l1', 'max_trials': 100, 'label': 'cylinder_linear_integrated_force_l1'}]
+    cpu_budget = None
+    max_jobs = 8
+    max_trials = 500
+    max_time = 36000
+    err_threshold = 1e-3
+    cpus = 4
+
+    # Initialize campaign
+    campaign = Campaign(studies=studies,
+                        cpu_budget=cpu_budget,
+                        max_jobs=max_jobs,
+                        max_trials=max_trials,
+                        max_time=max_time,
+                        err_threshold=err_threshold,
+                        cpus=cpus)
+    campaign.run()
@@ -1,12 +1,10 @@
 import numpy as np
 import os
 import sys
-import subprocess as sp
 import time
 import json
-from utils import InpWriter, JsonReader
+from utils import InpWriter, JsonReader, JobScheduler, ExportPool, ResultCache, Pipeline, Sample, Surrogate, ErrorEngine, ArtifactManager, Tracer, AutoTuner, Refiner, FieldMapper
 import optuna
-from rich.progress import Progress, BarColumn, TimeRemainingColumn, TimeElapsedColumn
 
 class ThresholdExceeded(optuna.exceptions.OptunaError):
     pass
@@ -18,7 +16,48 @@ class EVOMIA:
                  max_trials:int=100,
                  max_time:int=3600,
                  err_threshold:float=1e-3,
-                 batch_size:int=8) -> None:
+                 batch_size:int=8,
+                 cpus:int=4,
+                 cpu_budget:int=None,
+                 write_ahead:int=None,
+                 export_jobs:int=2,
+                 export_server:bool=True,
+                 export_timeout:float=600,
+                 compiled:bool=True,
+                 parallel:bool=False,
+                 popsize:int=None,
+                 pruner:optuna.pruners.BasePruner=None,
+                 cache_path:str='data/cache/',
+                 cache_tolerance:float=1e-6,
+                 cache_size:int=2**30,
+                 surrogate:bool=False,
+                 screening_factor:int=4,
+                 err_scale:dict=None,
+                 err_weight:dict=None,
+                 err_norm:str='l2',
+                 err_aggregate:str='mean',
+                 keep_top_k:int=10,
+                 disk_quota:int=None,
+                 compress:bool=True,
+                 resume:str=None,
+                 warm_start:str=None,
+                 storage:str='sqlite:///databoard.sqlite3',
+                 study_name:str=None,
+                 label:str=None,
+                 trace:bool=True,
+                 fidelities:list=None,
+                 fidelity_patience:int=3,
+                 packed:bool=False,
+                 auto_tune:bool=False,
+                 tune_cpus:list=None,
+                 refine:bool=False,
+                 refine_patience:int=3,
+                 timeout:float=None,
+                 timeout_factor:float=3.0,
+                 field_neighbors:int=4,
+                 scheduler:JobScheduler=None,
+                 priority:float=1.0,
+                 progress:bool=True) -> None:
         '''
         Parameter Optimization class
         This class is designed to perform optimization of model parameters in Abaqus.
@@ -30,7 +69,63 @@ class EVOMIA:
             max_trials: int, maximum iteration
             max_time: int, maximum time
             err_threshold: float, error threshold
-            batch_size: int, batch size
+            batch_size: int, maximum number of concurrent Abaqus jobs
+            cpus: int, number of cpus per Abaqus job
+            cpu_budget: int, total number of cpus shared by all Abaqus jobs, default all cpus
+            write_ahead: int, maximum number of input files written ahead of the solver queue, default batch size
+            export_jobs: int, maximum number of concurrent odb export jobs
+            export_server: bool, export with a pool of persistent export servers instead of one job per odb
+            export_timeout: float, wall-clock limit of the export of one odb in seconds, a hung export server
+                is killed and restarted, and the samples of the odb fail
+            compiled: bool, compile input file template with a shared include file
+            parallel: bool, evaluate a whole CMA-ES generation of trials in parallel
+            popsize: int, CMA-ES population size, default 4 + floor(3 * ln(number of parameters))
+            pruner: optuna.pruners.BasePruner, pruner of trials on the running mean error, default no pruning
+            cache_path: str, result cache directory shared by studies, None to disable the cache
+            cache_tolerance: float, quantization step of parameter values in the cache key
+            cache_size: int, maximum size of the result cache in bytes, default 1 GiB, None for unlimited
+            surrogate: bool, pre-screen candidates with a surrogate model in parallel mode
+            screening_factor: int, number of candidates proposed per simulated trial when pre-screening
+            err_scale: dict, scale of each output in the residuals, default 1
+            err_weight: dict, weight of each output in the residuals, default 1
+            err_norm: str, norm of the residuals of one sample, 'l2', 'l1' or 'linf'
+            err_aggregate: str, aggregation of the sample errors of one trial, 'mean', 'rms' or 'max'
+            keep_top_k: int, number of best trials whose odb files are kept, over the trials of all workers
+                of a study shared by distributed workers
+            disk_quota: int, maximum size of the trial artifacts in bytes, default unlimited, over the trials
+                of all workers of a study shared by distributed workers
+            compress: bool, compress input files of finished samples with gzip
+            resume: str, name of an interrupted study to be continued, default a new study
+            warm_start: str, name of a previous study on the same material to seed the sampler from
+            storage: str, database URL of the study, or path of a journal file shared by distributed workers
+            study_name: str, name of a study shared by distributed workers, created by the first worker
+                and joined by the others, default a new timestamped study
+            label: str, name of a new study in place of obj_name_material_output, timestamped like it,
+                e.g. to tell apart the studies of a campaign on the same object, material and output
+            trace: bool, stream the stage times of every sample and trial to trace.jsonl in the optimization path
+            fidelities: list, template fidelities from coarse to full in parallel mode, e.g. ['coarse', 'medium', 'full'],
+                the template of fidelity f is {obj_name}_{material}_{f}.inp and 'full' is {obj_name}_{material}.inp,
+                default full fidelity only
+            fidelity_patience: int, number of generations without improvement before promoting to the next fidelity
+            packed: bool, pack all ground truth samples of a trial into one multi-step job, one step per sample,
+                only valid for path-independent models since each step starts from the state of the previous one
+            auto_tune: bool, tune the cpus per job and the number of concurrent jobs from the samples per hour
+                measured at every candidate, instead of cpus and batch size, and tune again when the times drift;
+                in sequential mode at most the jobs of one trial run at once, and the candidates are measured so
+            tune_cpus: list, cpus per job measured by the auto tuner, default powers of 2 up to the cpu budget
+            refine: bool, switch from CMA-ES to Levenberg-Marquardt refinement of the best trial when CMA-ES stagnates,
+                with finite-difference Jacobians simulated as parallel batches of trials in the same study
+            refine_patience: int, number of CMA-ES generations improving the best error by less than 1% before refining
+            timeout: float, wall-clock limit of the solve of one sample in seconds, default unlimited
+            timeout_factor: float, adaptive limit of the solve of one sample as a multiple of the 95th percentile
+                of the solve times so far, default 3, None for a fixed limit only;
+                a killed or failed sample fails its trial and cancels the rest of it
+            field_neighbors: int, number of nearest nodes interpolated at every measured point of a field output,
+                used when the ground truth samples give the measured "points" of their field outputs
+            scheduler: JobScheduler, solver pool shared with other studies, e.g. by a campaign, default a pool
+                of its own; the study then runs at most batch_size jobs on at most cpu_budget cpus of the pool
+            priority: float, weight of the study in the fair share of a shared solver pool
+            progress: bool, show the progress bars of the samples
 
         Returns:
             None
@@ -44,7 +139,13 @@ class EVOMIA:
 
         # Initialization
         print('{:-^70s}'.format(' INITIALIZATION '))
-        if obj_name == 'example':
+        if resume is not None:
+            self.opt_name = resume
+        elif study_name is not None:
+            self.opt_name = study_name
+        elif label is not None:
+            self.opt_name = label + time.strftime('_%Y%m%d-%H%M%S')
+        elif obj_name == 'example':
             self.opt_name = 'example'
         else:
             self.opt_name = obj_name + '_' + material + '_' + output + time.strftime('_%Y%m%d-%H%M%S')
@@ -61,12 +162,101 @@ class EVOMIA:
         print('Maximum time:', self.max_time)
         self.err_threshold = err_threshold
         print('Error threshold:', self.err_threshold)
+        self.err_scale = err_scale
+        self.err_weight = err_weight
+        self.err_norm = err_norm
+        self.err_aggregate = err_aggregate
+        print('Error norm:', self.err_norm, self.err_aggregate)
         self.opt_path = 'data/' + self.opt_name + '/'
         print('Optimization path:', self.opt_path)
         self.inp_writer = InpWriter(inp_template=self.inp_template)
         self.json_reader = JsonReader()
         self.batch_size = batch_size
-        self.counter = 0
+        print('Batch size:', self.batch_size)
+        self.cpus = cpus
+        print('CPUs per job:', self.cpus)
+        if cpu_budget is None:
+            cpu_budget = scheduler.cpu_budget if scheduler is not None else os.cpu_count()
+        self.cpu_budget = cpu_budget
+        print('CPU budget:', self.cpu_budget)
+        self.write_ahead = write_ahead if write_ahead is not None else batch_size
+        print('Write ahead:', self.write_ahead)
+        self.export_jobs = export_jobs
+        print('Export jobs:', self.export_jobs)
+        self.export_server = export_server
+        print('Export server:', self.export_server)
+        self.export_timeout = export_timeout
+        print('Export timeout:', self.export_timeout)
+        self.compiled = compiled
+        print('Compiled template:', self.compiled)
+        self.parallel = parallel
+        print('Parallel trials:', self.parallel)
+        self.popsize = popsize if popsize is not None else 4 + int(np.floor(3 * np.log(len(self.opt_params))))
+        print('Population size:', self.popsize)
+        self.pruner = pruner
+        print('Pruner:', type(self.pruner).__name__ if self.pruner is not None else None)
+        self.pruned = set()
+        self.failed = set()
+        self.cache_path = cache_path
+        print('Cache path:', self.cache_path)
+        self.cache_tolerance = cache_tolerance
+        self.cache_size = cache_size
+        self.screening_factor = screening_factor
+        self.surrogate = Surrogate(bounds=self.opt_params) if surrogate else None
+        self.surrogate_trials = set()
+        print('Surrogate:', surrogate)
+        if surrogate and not parallel:
+            print('\033[33mWARNING: SURROGATE IS ONLY USED IN PARALLEL MODE\033[0m')
+        self.keep_top_k = keep_top_k
+        print('Keep top k:', self.keep_top_k)
+        self.disk_quota = disk_quota
+        print('Disk quota:', self.disk_quota)
+        self.compress = compress
+        self.resume = resume
+        print('Resume:', self.resume)
+        self.warm_start = warm_start
+        print('Warm start:', self.warm_start)
+        self.storage = storage
+        print('Storage:', self.storage)
+        self.study_name = study_name
+        self.label = label
+        print('Label:', self.label)
+        self.trace = trace
+        print('Trace:', self.trace)
+        self.fidelities = fidelities
+        print('Fidelities:', self.fidelities)
+        self.fidelity_patience = fidelity_patience
+        self.packed = packed
+        print('Packed:', self.packed)
+        self.auto_tune = auto_tune
+        print('Auto tune:', self.auto_tune)
+        self.tune_cpus = tune_cpus
+        self.refine = refine
+        print('Refine:', self.refine)
+        self.refine_patience = refine_patience
+        self.timeout = timeout
+        self.timeout_factor = timeout_factor
+        print('Timeout:', self.timeout, self.timeout_factor)
+        self.field_neighbors = field_neighbors
+        self.shared = scheduler is not None
+        print('Shared scheduler:', self.shared)
+        self.priority = priority
+        print('Priority:', self.priority)
+        self.progress = progress
+        self.output_params = json.load(open('templates/output/' + output + '.json', 'r'))
+        if fidelities is not None:
+            self.templates = [self.inp_template if fidelity == 'full' else
+                              'templates/inp/' + obj_name + '_' + material + '_' + fidelity + '.inp'
+                              for fidelity in fidelities]
+            if not parallel:
+                print('\033[33mWARNING: FIDELITIES ARE ONLY USED IN PARALLEL MODE\033[0m')
+        self.level = 0
+        # Paired outputs of the same parameters at fidelity l and l + 1
+        self.pairs = [list() for _ in (fidelities or [None])]
+        self.level_best = float('inf')
+        self.level_stall = 0
+        self.finished = 0
+        self.study = None
         
         # Check if the input parameters are valid
         try:
@@ -74,13 +264,108 @@ class EVOMIA:
                 raise ValueError('\033[31mERROR: GROUND TRUTH IS EMPTY !!!\033[0m')
             if not os.path.exists(self.inp_template):
                 raise FileNotFoundError('\033[31mERROR: INP TEMPLATE NOT FOUND !!!\033[0m')
+            if self.resume is not None and not os.path.exists(self.opt_path):
+                raise FileNotFoundError('\033[31mERROR: OPTIMIZATION PATH NOT FOUND !!!\033[0m')
+            if self.fidelities is not None and self.fidelities[-1] != 'full':
+                raise ValueError('\033[31mERROR: LAST FIDELITY MUST BE FULL !!!\033[0m')
+            if self.fidelities is not None and not all(os.path.exists(template) for template in self.templates):
+                raise FileNotFoundError('\033[31mERROR: FIDELITY TEMPLATE NOT FOUND !!!\033[0m')
+            if 'points' in self.opt_gt[0] and self.output_params['type'] != 'field':
+                raise ValueError('\033[31mERROR: MEASURED POINTS NEED A FIELD OUTPUT !!!\033[0m')
+            if 'points' in self.opt_gt[0] and self.fidelities is not None:
+                raise ValueError('\033[31mERROR: MEASURED POINTS ARE NOT SUPPORTED WITH FIDELITIES !!!\033[0m')
         except (ValueError, FileNotFoundError) as e:
             print(e)
             sys.exit()
         
         # Create optimization path
-        if not os.path.exists(self.opt_path):
-            os.makedirs(self.opt_path)
+        os.makedirs(self.opt_path, exist_ok=True)
+
+        # Compile input file template
+        if self.compiled:
+            self.inp_writer.compile(keys=list(self.opt_params.keys()) + list(self.opt_gt[0]["input"].keys()),
+                                    include=self.opt_path + 'model.inp')
+        if self.fidelities is not None:
+            self.inp_writers = list()
+            for fidelity, template in zip(self.fidelities, self.templates):
+                if fidelity == 'full':
+                    self.inp_writers.append(self.inp_writer)
+                    continue
+                self.inp_writers.append(InpWriter(inp_template=template))
+                if self.compiled:
+                    self.inp_writers[-1].compile(keys=list(self.opt_params.keys()) + list(self.opt_gt[0]["input"].keys()),
+                                                 include=self.opt_path + 'model_' + fidelity + '.inp')
+
+        # Map field outputs onto the measured points, one weight matrix per distinct point set
+        self.field_mappers = None
+        if 'points' in self.opt_gt[0]:
+            mappers = dict()
+            self.field_mappers = list()
+            for sample in self.opt_gt:
+                self.field_mappers.append(dict())
+                for key, points in sample['points'].items():
+                    points = np.asarray(points, dtype=float)
+                    if points.tobytes() not in mappers:
+                        mappers[points.tobytes()] = FieldMapper(template=self.inp_template,
+                                                                points=points,
+                                                                region=self.output_params['region'],
+                                                                neighbors=self.field_neighbors)
+                    self.field_mappers[-1][key] = mappers[points.tobytes()]
+            print('Field mappers:', len(mappers))
+
+        # Compile ground truth
+        self.error_engine = ErrorEngine(ground_truth=self.opt_gt,
+                                        scale=self.err_scale,
+                                        weight=self.err_weight,
+                                        norm=self.err_norm,
+                                        aggregate=self.err_aggregate,
+                                        mappers=self.field_mappers)
+
+        # Create tracer, result cache, artifact manager, job schedulers and pipeline
+        self.tracer = Tracer(file=self.opt_path + 'trace.jsonl' if self.trace else None)
+        self.result_cache = ResultCache(path=self.cache_path,
+                                        tolerance=self.cache_tolerance,
+                                        max_size=self.cache_size) if self.cache_path is not None else None
+        self.artifact_manager = ArtifactManager(keep_top_k=self.keep_top_k,
+                                                quota=self.disk_quota,
+                                                compress=self.compress)
+        # The auto tuner bounds the concurrent jobs by the cpu budget, and in sequential mode
+        # by the jobs of one trial, all that is in flight at once
+        self.auto_tuner = AutoTuner(cpu_budget=self.cpu_budget,
+                                    candidates=self.tune_cpus,
+                                    max_jobs=None if self.parallel else
+                                    1 if self.packed else len(self.opt_gt)) if self.auto_tune else None
+        if self.shared:
+            # Fair share of the pool, capped by the budget of the study
+            self.scheduler = scheduler
+            self.scheduler.share(self.opt_name,
+                                 weight=self.priority,
+                                 max_cpus=self.cpu_budget,
+                                 max_jobs=self.batch_size if self.auto_tuner is None else None)
+        else:
+            self.scheduler = JobScheduler(cpu_budget=self.cpu_budget,
+                                          max_jobs=self.batch_size if self.auto_tuner is None else None)
+        self.export_scheduler = JobScheduler(cpu_budget=self.export_jobs,
+                                             max_jobs=self.export_jobs)
+        self.export_pool = ExportPool(size=self.export_jobs,
+                                      timeout=self.export_timeout) if self.export_server else None
+        self.pipeline = Pipeline(inp_writer=self.inp_writer,
+                                 json_reader=self.json_reader,
+                                 output=self.output,
+                                 scheduler=self.scheduler,
+                                 export_scheduler=self.export_scheduler,
+                                 export_pool=self.export_pool,
+                                 cpus=self.cpus,
+                                 write_ahead=self.write_ahead,
+                                 result_cache=self.result_cache,
+                                 artifact_manager=self.artifact_manager,
+                                 packed=self.packed,
+                                 auto_tuner=self.auto_tuner,
+                                 timeout=self.timeout,
+                                 timeout_factor=self.timeout_factor,
+                                 owner=self.opt_name if self.shared else None,
+                                 progress=self.progress,
+                                 export_timeout=self.export_timeout)
 
         # Save configuration
         with open(self.opt_path + 'config.json', 'w') as f:
@@ -90,32 +375,264 @@ class EVOMIA:
                        'Maximum iteration': self.max_trials,
                        'Maximum time': self.max_time,
                        'Error threshold': self.err_threshold,
-                       'Batch size': self.batch_size},
+                       'Error scale': self.err_scale,
+                       'Error weight': self.err_weight,
+                       'Error norm': self.err_norm,
+                       'Error aggregate': self.err_aggregate,
+                       'Batch size': self.batch_size,
+                       'CPUs per job': self.cpus,
+                       'CPU budget': self.cpu_budget,
+                       'Write ahead': self.write_ahead,
+                       'Export jobs': self.export_jobs,
+                       'Export server': self.export_server,
+                       'Export timeout': self.export_timeout,
+                       'Compiled template': self.compiled,
+                       'Parallel trials': self.parallel,
+                       'Population size': self.popsize,
+                       'Pruner': type(self.pruner).__name__ if self.pruner is not None else None,
+                       'Cache path': self.cache_path,
+                       'Cache tolerance': self.cache_tolerance,
+                       'Cache size': self.cache_size,
+                       'Surrogate': self.surrogate is not None,
+                       'Screening factor': self.screening_factor,
+                       'Keep top k': self.keep_top_k,
+                       'Disk quota': self.disk_quota,
+                       'Compress': self.compress,
+                       'Resume': self.resume,
+                       'Warm start': self.warm_start,
+                       'Storage': self.storage,
+                       'Study name': self.study_name,
+                       'Label': self.label,
+                       'Trace': self.trace,
+                       'Fidelities': self.fidelities,
+                       'Fidelity patience': self.fidelity_patience,
+                       'Packed': self.packed,
+                       'Auto tune': self.auto_tune,
+                       'Tune CPUs': self.tune_cpus,
+                       'Refine': self.refine,
+                       'Refine patience': self.refine_patience,
+                       'Timeout': self.timeout,
+                       'Timeout factor': self.timeout_factor,
+                       'Field neighbors': self.field_neighbors,
+                       'Shared scheduler': self.shared,
+                       'Priority': self.priority},
                       f,
                       sort_keys=True,
                       indent=4,
                       separators=(',', ': '))
     
-    def cal_error(self,
-                  res:dict,
-                  gt:dict) -> dict:
+    def suggest(self,
+                trial:optuna.Trial) -> dict:
         '''
-        Check error
+        Suggest parameters
 
         Args:
-            res: dict, optimization results
-            gt: dict, optimization ground truth
+            trial: optuna.Trial, optimization trial
 
         Returns:
-            err: dict, error
+            param_vals: dict, parameter values
         '''
 
-        err = {key: 0 for key in gt.keys()}
-        for key in gt.keys():
-            err[key] = float(res[key]) - float(gt[key])
-        
-        return err
-    
+        param_vals = dict()
+        for key in self.opt_params.keys():
+            param_vals[key] = trial.suggest_float(key, 
+                                                  self.opt_params[key][0], 
+                                                  self.opt_params[key][1])
+
+        return param_vals
+
+    def sample_error(self,
+                     result:dict,
+                     num:int,
+                     correction:np.ndarray=None) -> float:
+        '''
+        Error of one sample
+
+        Args:
+            result: dict, result of the sample
+            num: int, sample number
+            correction: np.ndarray, correction added to the outputs, shape (samples, outputs)
+
+        Returns:
+            err_norm: float, error norm, nan if the sample has no result
+        '''
+
+        outputs = self.error_engine.to_array([result if i == num else None for i in range(len(self.opt_gt))])
+        if correction is not None:
+            outputs = outputs + correction
+        err_norm = float(self.error_engine.sample_errors(outputs)[num])
+
+        return err_norm
+
+    def score(self,
+              results:list,
+              correction:np.ndarray=None) -> float:
+        '''
+        Score results of one trial
+
+        Args:
+            results: list, results of all samples
+            correction: np.ndarray, correction added to the outputs, shape (samples, outputs)
+
+        Returns:
+            err_mean: float, aggregated error, nan if any sample has no result
+        '''
+
+        outputs = self.error_engine.to_array(results)
+        if correction is not None:
+            outputs = outputs + correction
+        err_mean = float(self.error_engine.score(outputs))
+
+        return err_mean
+
+    def report(self,
+               trial:optuna.Trial,
+               errs:dict) -> bool:
+        '''
+        Report running mean error of the finished samples
+        Only the contiguous prefix of samples in sample order is reported, so that step k
+        always covers samples 0 to k-1 whichever samples finish first.
+
+        Args:
+            trial: optuna.Trial, optimization trial
+            errs: dict, errors of the finished samples by sample number, in completion order
+
+        Returns:
+            pruned: bool, whether the trial should be pruned
+        '''
+
+        steps = 0
+        while steps in errs:
+            steps += 1
+        # The last finished sample adds steps only if it closes the gap of the prefix
+        last = list(errs)[-1]
+        if self.pruner is None or last >= steps or np.isnan([errs[num] for num in range(steps)]).any():
+            return False
+        for step in range(last + 1, steps + 1):
+            trial.report(float(np.mean([errs[num] for num in range(step)])), 
+                         step=step)
+
+        return trial.should_prune()
+
+    def save_tuning(self) -> None:
+        '''
+        Save the chosen cpus per job and the measured solve times to config.json
+        '''
+
+        if self.auto_tuner is None:
+            return
+        with open(self.opt_path + 'config.json', 'r') as f:
+            config = json.load(f)
+        config['Auto tuning'] = self.auto_tuner.summary()
+        with open(self.opt_path + 'config.json', 'w') as f:
+            json.dump(config,
+                      f,
+                      sort_keys=True,
+                      indent=4,
+                      separators=(',', ': '))
+
+    def clean(self) -> None:
+        '''
+        Remove abaqus.rpy files
+        '''
+
+        for file in os.listdir('utils'):
+            if file.startswith('abaqus.rpy'):
+                try:
+                    os.remove('utils/' + file)
+                except OSError:
+                    # Removed by another study of the campaign, or still open by an export server on Windows
+                    pass
+
+    def sync_artifacts(self,
+                       study:optuna.Study) -> None:
+        '''
+        Rank the artifacts over the finished trials of all workers
+        Only studies shared by distributed workers are synchronized.
+
+        Args:
+            study: optuna.Study, optimization study
+        '''
+
+        if self.study_name is None:
+            return
+        states = (optuna.trial.TrialState.COMPLETE,
+                  optuna.trial.TrialState.PRUNED,
+                  optuna.trial.TrialState.FAIL)
+        trials = dict()
+        for trial in study.get_trials(deepcopy=False, states=states):
+            if trial.user_attrs.get('Jobs'):
+                trials[str(trial.number)] = (trial.value if trial.state == optuna.trial.TrialState.COMPLETE else float('inf'),
+                                             [tuple(job) for job in trial.user_attrs['Jobs']])
+        self.artifact_manager.sync(trials)
+
+    def make_samples(self,
+                     group:str,
+                     path:str,
+                     param_vals:dict,
+                     resumed:list=None,
+                     level:int=None) -> list:
+        '''
+        Make samples of one trial, one per ground truth sample
+
+        Args:
+            group: str, trial name, used as prefix of the job names
+            path: str, working directory
+            param_vals: dict, parameter values
+            resumed: list, (path, name) of the jobs of an interrupted trial with the same parameters,
+                whose exported results are reused
+            level: int, fidelity level, default full fidelity
+
+        Returns:
+            samples: list, samples to be run through the pipeline
+        '''
+
+        template = self.templates[level] if level is not None else self.inp_template
+        inp_writer = self.inp_writers[level] if level is not None else None
+        samples = list()
+        for num in range(len(self.opt_gt)):
+            key = None
+            if self.result_cache is not None:
+                key = self.result_cache.key(template=template,
+                                            output='templates/output/' + self.output + '.json',
+                                            inputs=self.opt_gt[num]["input"],
+                                            parameters=param_vals,
+                                            packed=self.packed)
+            samples.append(Sample(name=group + '_' + str(num),
+                                  path=path,
+                                  parameters={**param_vals,
+                                              **self.opt_gt[num]["input"]},
+                                  group=group,
+                                  tag=num,
+                                  key=key,
+                                  inp_writer=inp_writer))
+            if resumed is not None:
+                samples[-1].result = self.load_result(*resumed[num])
+
+        return samples
+
+    def load_result(self,
+                    path:str,
+                    name:str) -> dict:
+        '''
+        Load the exported result of a job
+
+        Args:
+            path: str, working directory
+            name: str, job name
+
+        Returns:
+            result: dict, exported result, None if the job was not exported
+        '''
+
+        try:
+            with open(path + name + '.json', 'r') as f:
+                result = self.json_reader.resolve(path, json.load(f))
+        except (OSError, ValueError):
+            return None
+
+        return result or None
+
     def objective(self,
                   trial:optuna.Trial) -> float:
         '''
@@ -128,130 +645,649 @@ class EVOMIA:
             err_mean: float, mean error
         '''
 
-        self.counter += 1
-        # print('{:-^70s}'.format(' TRIAL ' + str(self.counter) + ' '))
+        # Name jobs after the trial number, unique across workers and refinement trials
+        group = str(trial.number)
 
-        param_vals = dict()
-        for key in self.opt_params.keys():
-            param_vals[key] = trial.suggest_float(key, 
-                                                  self.opt_params[key][0], 
-                                                  self.opt_params[key][1])
+        param_vals = self.suggest(trial)
 
-        # Init result list
-        results = list()
-
-        # Write input file
-        with Progress("[progress.description]{task.description}", 
-                      BarColumn(), 
-                      "[progress.percentage]{task.percentage:>3.0f}%", 
-                      TimeRemainingColumn(), 
-                      TimeElapsedColumn()) as progress:
-            writing_task = progress.add_task("Writing", 
-                                             total=len(self.opt_gt))
-            
-            for num in range(len(self.opt_gt)):
-                inp = self.opt_path + str(self.counter) + '_' + str(num) + '.inp'
-                self.inp_writer.write(inp, 
-                                      {**param_vals,
-                                       **self.opt_gt[num]["input"]})
-                progress.update(writing_task, 
-                                advance=1)
-            
-            progress.refresh()
-        
-        # Run Abaqus
-        with Progress("[progress.description]{task.description}", 
-                      BarColumn(), 
-                      "[progress.percentage]{task.percentage:>3.0f}%", 
-                      TimeRemainingColumn(), 
-                      TimeElapsedColumn()) as progress:
-            running_task = progress.add_task("Running", 
-                                             total=len(self.opt_gt))
-
-            for batch in range(0, len(self.opt_gt), self.batch_size):
-                processes = list()
-                for num in range(batch, min(batch + self.batch_size, len(self.opt_gt))):
-                    process = sp.Popen('abaqus job=' + str(self.counter) + '_' + str(num) + ' cpus=4 int', 
-                                    cwd=self.opt_path,
-                                    shell=True, 
-                                    stdout=sp.DEVNULL, 
-                                    stderr=sp.STDOUT)
-                    processes.append(process)
-
-                finished_count = 0
-                while True:
-                    for process in processes:
-                        process.communicate()
-                        if process.poll() is not None:
-                            finished_count += 1
-                            progress.update(running_task, advance=1)
-                    if finished_count == len(self.opt_gt):
-                        break
-
-                progress.refresh()
-
-        # Read results
-        with Progress("[progress.description]{task.description}", 
-                      BarColumn(), 
-                      "[progress.percentage]{task.percentage:>3.0f}%", 
-                      TimeRemainingColumn(), 
-                      TimeElapsedColumn()) as progress:
-            reading_task = progress.add_task("Reading", 
-                                             total=len(self.opt_gt))
-
-            odbs = [str(self.counter) + '_' + str(num) + '.odb' for num in range(len(self.opt_gt))]
-            for batch in range(0, len(self.opt_gt), self.batch_size):
-                processes = list()
-                for num in range(batch, min(batch + self.batch_size, len(self.opt_gt))):
-                    process = sp.Popen('abaqus cae noGUI=odb_exporter.py -- ' + str(self.opt_path) + ' ' + str(odbs[num]) + ' ' + str(self.output),
-                                       cwd='utils',
-                                       shell=True,
-                                       stdout=sp.DEVNULL,
-                                       stderr=sp.STDOUT)
-                    processes.append(process)
-
-                finished_count = 0
-                while True:
-                    for num, process in enumerate(processes):
-                        process.communicate()
-                        if process.poll() is not None:
-                            finished_count += 1
-                            results.append(self.json_reader.read(path=self.opt_path,
-                                                                 odb=odbs[batch + num]))
-                            progress.update(reading_task, 
-                                            advance=1)
-                    if finished_count == len(self.opt_gt):
-                        break
-
-                progress.update(reading_task, advance=1)
-
-            progress.refresh()
-
-            # Remove abaqus.rpy files
-            for file in os.listdir('utils'):
-                if file.startswith('abaqus.rpy'):
-                    os.remove('utils/' + file)
+        # Write input file, run Abaqus and read results
+        samples = self.make_samples(group=group,
+                                    path=self.opt_path,
+                                    param_vals=param_vals,
+                                    resumed=trial.user_attrs.get('Resumed jobs'))
+        trial.set_user_attr('Jobs', [list(job) for job in self.pipeline.jobs(samples)])
+
+        # Report running mean error and cancel the remaining samples if pruned or failed
+        errs = dict()
+        failures = dict()
+        def report(sample:Sample) -> None:
+            if sample.group not in self.pruned and sample.group not in self.failed:
+                self.tracer.sample(trial.number, sample)
+                if sample.failure is not None:
+                    failures[sample.name] = sample.failure
+                    self.failed.add(sample.group)
+                    self.pipeline.cancel(sample.group)
+                    return
+                errs[sample.tag] = self.sample_error(sample.result, sample.tag)
+                if self.report(trial, errs):
+                    self.pruned.add(sample.group)
+                    self.pipeline.cancel(sample.group)
+
+        self.pipeline.run(samples, callback=report)
+        self.clean()
+        self.save_tuning()
+        self.sync_artifacts(trial.study)
+        jobs = self.pipeline.jobs(samples)
+        if group in self.pruned:
+            self.record(trial, 'PRUNED', None, [sample for sample in samples if sample.stage == 'done'])
+            self.artifact_manager.register(group, float('inf'), jobs)
+            print('Pruned:', np.mean(list(errs.values())))
+            print('Parameters:', param_vals)
+            raise optuna.TrialPruned()
+        if group in self.failed:
+            self.record(trial, 'FAIL', None, [sample for sample in samples if sample.stage == 'done'])
+            trial.set_user_attr('Failures', failures)
+            self.artifact_manager.register(group, float('inf'), jobs)
+            print('\033[31mFailed:', failures, '\033[0m')
+            print('Parameters:', param_vals)
+            return float('nan')
 
         # Calculate error
-        errs = list()
-        for i, result in enumerate(results):
-            if result == {}:
-                return float('nan')
-            err = self.cal_error(result, 
-                                 self.opt_gt[i]["output"])
-            err_norm = np.linalg.norm([err[key] for key in err.keys()])
-            errs.append(err_norm)
-        err_mean = np.mean(errs, axis=0)
+        start_time = time.time()
+        err_mean = self.score([sample.result for sample in samples])
+        self.record(trial, 'COMPLETE', err_mean, samples, time.time() - start_time)
+        self.artifact_manager.register(group, err_mean, jobs)
+        trial.set_user_attr('Results', self.error_engine.to_json([sample.result for sample in samples]))
+        trial.set_user_attr('Solve time', sum(sample.times.get('solve', 0.0) for sample in samples))
 
         print('Error:', err_mean)
         print('Parameters:', param_vals)
 
         return err_mean
-    
+
+    def record(self,
+               trial:optuna.Trial,
+               state:str,
+               value:float,
+               samples:list,
+               score:float=0.0) -> None:
+        '''
+        Record stage times of one trial
+        The times are traced and stored as user attributes of the trial.
+
+        Args:
+            trial: optuna.Trial, optimization trial
+            state: str, trial state
+            value: float, trial error
+            samples: list, finished samples of the trial
+            score: float, time to score the trial
+        '''
+
+        trial.set_user_attr('Stage times', self.tracer.trial(trial.number, state, value, samples, score))
+        trial.set_user_attr('Sample times', {sample.name: sample.times for sample in samples})
+        trial.set_user_attr('Exit codes', {sample.name: sample.returncode for sample in samples})
+
+    def optimize_parallel(self,
+                          study:optuna.Study) -> None:
+        '''
+        Parallel optimization
+        A whole generation of trials is asked from the sampler at once, and every
+        (trial, sample) pair is sent to the shared solver pool. Each trial is told
+        as soon as its last sample is read. Every trial works in its own directory
+        named after the trial number, so that job names never collide.
+
+        Args:
+            study: optuna.Study, optimization study
+
+        Raises:
+            ThresholdExceeded: if the error threshold is reached
+        '''
+
+        start_time = time.time()
+        n_trials = self.finished
+        while n_trials < self.max_trials and time.time() - start_time < self.max_time:
+            # Ask a generation of trials
+            n_ask = min(self.popsize, self.max_trials - n_trials)
+            screening = self.surrogate is not None and self.update_surrogate(study)
+            factor = self.screening_factor if screening else 1
+            asked = list()
+            for _ in range(n_ask * factor):
+                if self.study_name is not None \
+                    and len(asked) >= (self.max_trials - self.count_trials(study)) * factor:
+                    # The trial budget is shared by all workers
+                    break
+                trial = study.ask()
+                if self.study_name is not None and not screening and not self.claim(study, trial):
+                    # Another worker claimed the rest of the budget at the same time
+                    study.tell(trial, state=optuna.trial.TrialState.FAIL)
+                    break
+                asked.append((trial, self.suggest(trial)))
+            if not asked:
+                break
+            n_ask = len(asked)
+
+            # Pre-screen candidates with the surrogate and simulate only the best ones
+            fit_time, predict_time = (self.surrogate.fit_time, self.surrogate.predict_time) if self.surrogate is not None else (0.0, 0.0)
+            if screening:
+                outputs = self.surrogate.predict([param_vals for _, param_vals in asked])
+                predictions = self.error_engine.score(outputs)
+                order = np.argsort(predictions)
+                for i in order[n_ask // self.screening_factor:]:
+                    asked[i][0].set_user_attr('Surrogate error', float(predictions[i]))
+                    study.tell(asked[i][0], state=optuna.trial.TrialState.PRUNED)
+                for i in order[:n_ask // self.screening_factor]:
+                    asked[i][0].set_user_attr('Surrogate error', float(predictions[i]))
+                asked = [asked[i] for i in order[:n_ask // self.screening_factor]]
+            if self.surrogate is not None:
+                for trial, _ in asked:
+                    trial.set_user_attr('Surrogate fit time', self.surrogate.fit_time - fit_time)
+                    trial.set_user_attr('Surrogate predict time', self.surrogate.predict_time - predict_time)
+
+            # Explore at the current fidelity, and probe the next fidelity with the first trial
+            level = self.level if self.fidelities is not None else None
+            correction = self.correction(level) if level is not None else None
+            probes = dict()
+            trials = dict()
+            samples = list()
+            for trial, param_vals in asked:
+                path = self.opt_path + str(trial.number) + '/'
+                if not os.path.exists(path):
+                    os.makedirs(path)
+                trials[str(trial.number)] = {'trial': trial,
+                                             'params': param_vals,
+                                             'results': [None] * len(self.opt_gt),
+                                             'errs': dict(),
+                                             'samples': list(),
+                                             'solve time': 0.0}
+                trial_samples = self.make_samples(group=str(trial.number),
+                                                  path=path,
+                                                  param_vals=param_vals,
+                                                  resumed=trial.user_attrs.get('Resumed jobs'),
+                                                  level=level)
+                trials[str(trial.number)]['jobs'] = self.pipeline.jobs(trial_samples)
+                trial.set_user_attr('Jobs', [list(job) for job in trials[str(trial.number)]['jobs']])
+                samples += trial_samples
+                if level is not None:
+                    trial.set_user_attr('Fidelity', self.fidelities[level])
+                    if level < len(self.fidelities) - 1 and not probes:
+                        probe_samples = self.make_samples(group=str(trial.number) + 'p',
+                                                          path=path,
+                                                          param_vals=param_vals,
+                                                          level=level + 1)
+                        probes[str(trial.number) + 'p'] = {'trial': str(trial.number),
+                                                           'results': [None] * len(self.opt_gt),
+                                                           'jobs': self.pipeline.jobs(probe_samples)}
+                        samples += probe_samples
+            n_trials += len(trials)
+
+            # Tell each trial as soon as all of its samples are read or it is pruned
+            def tell(sample:Sample) -> None:
+                if sample.group in probes:
+                    self.tracer.sample(int(probes[sample.group]['trial']), sample)
+                    probes[sample.group]['results'][sample.tag] = sample.result if sample.failure is None else None
+                    return
+                if sample.group in self.pruned or sample.group in self.failed:
+                    return
+                state = trials[sample.group]
+                self.tracer.sample(state['trial'].number, sample)
+                if sample.failure is not None:
+                    # Cancel the remaining samples of a failed trial at once
+                    self.failed.add(sample.group)
+                    self.pipeline.cancel(sample.group)
+                    state['samples'].append(sample)
+                    self.record(state['trial'], 'FAIL', None, state['samples'])
+                    state['trial'].set_user_attr('Failures', {sample.name: sample.failure})
+                    study.tell(state['trial'], state=optuna.trial.TrialState.FAIL)
+                    self.artifact_manager.register(sample.group, float('inf'), state['jobs'])
+                    print('Trial:', state['trial'].number, '\033[31mFailed:', sample.failure, '\033[0m')
+                    return
+                state['samples'].append(sample)
+                state['results'][sample.tag] = sample.result
+                state['errs'][sample.tag] = self.sample_error(sample.result, sample.tag, correction)
+                state['solve time'] += sample.times.get('solve', 0.0)
+                if self.report(state['trial'], state['errs']):
+                    self.pruned.add(sample.group)
+                    self.pipeline.cancel(sample.group)
+                    self.record(state['trial'], 'PRUNED', None, state['samples'])
+                    study.tell(state['trial'], state=optuna.trial.TrialState.PRUNED)
+                    self.artifact_manager.register(sample.group, float('inf'), state['jobs'])
+                    print('Trial:', state['trial'].number, 'Pruned:', np.mean(list(state['errs'].values())))
+                    return
+                if None in state['results']:
+                    return
+                start_time = time.time()
+                err_mean = self.score(state['results'], correction)
+                self.record(state['trial'], 'COMPLETE', err_mean, state['samples'], time.time() - start_time)
+                state['err'] = err_mean
+                if correction is not None and correction.any():
+                    state['trial'].set_user_attr('Raw error', self.score(state['results']))
+                state['trial'].set_user_attr('Results', self.error_engine.to_json(state['results']))
+                state['trial'].set_user_attr('Solve time', state['solve time'])
+                study.tell(state['trial'], err_mean)
+                self.artifact_manager.register(sample.group, err_mean, state['jobs'])
+                print('Trial:', state['trial'].number, 'Error:', err_mean)
+                print('Parameters:', state['params'])
+
+            self.pipeline.run(samples, callback=tell)
+            self.clean()
+            self.save_tuning()
+            self.sync_artifacts(study)
+            if self.study_name is not None:
+                # Count the trials of all workers
+                n_trials = self.count_trials(study)
+
+            # Learn the correction between fidelities and promote the population
+            if level is not None:
+                for group, probe in probes.items():
+                    state = trials[probe['trial']]
+                    if None not in probe['results'] and None not in state['results']:
+                        self.pairs[level].append((self.error_engine.to_array(state['results']),
+                                                  self.error_engine.to_array(probe['results'])))
+                    self.artifact_manager.register(group, float('inf'), probe['jobs'])
+                self.update_fidelity([state['err'] for state in trials.values() if 'err' in state],
+                                     self.max_trials - n_trials)
+
+            # Check error threshold
+            best_trial = self.best_trial(study)
+            if best_trial is not None and best_trial.value < self.err_threshold:
+                raise ThresholdExceeded()
+            if self.refine and self.stagnated(study):
+                break
+
+    def stagnated(self,
+                  study:optuna.Study) -> bool:
+        '''
+        Check if CMA-ES stagnates
+        CMA-ES stagnates when the best error of the last refine_patience generations
+        improves the best error before them by less than 1%.
+
+        Args:
+            study: optuna.Study, optimization study
+
+        Returns:
+            stagnated: bool, whether CMA-ES stagnates
+        '''
+
+        window = self.refine_patience * self.popsize
+        trials = [trial for trial in study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,))
+                  if trial.user_attrs.get('Fidelity', 'full') == 'full' and 'Refinement' not in trial.user_attrs]
+        if len(trials) <= window:
+            return False
+        before = min(trial.value for trial in trials[:-window])
+
+        return min(trial.value for trial in trials) > before * 0.99
+
+    def evaluate(self,
+                 study:optuna.Study,
+                 points:list,
+                 stage:str) -> list:
+        '''
+        Simulate a batch of parameter values as trials of the study
+        All samples of the batch run through the pipeline at once.
+
+        Args:
+            study: optuna.Study, optimization study
+            points: list, parameter values of every trial
+            stage: str, refinement stage stored as user attribute of the trials
+
+        Returns:
+            evaluations: list, (error, results) of every trial, error nan if a sample has no result
+        '''
+
+        trials = list()
+        samples = list()
+        for param_vals in points:
+            study.enqueue_trial(param_vals,
+                                user_attrs={'Refinement': stage})
+            trial = study.ask()
+            group = str(trial.number)
+            path = self.opt_path + group + '/'
+            if not os.path.exists(path):
+                os.makedirs(path)
+            trial_samples = self.make_samples(group=group,
+                                              path=path,
+                                              param_vals=self.suggest(trial))
+            trial.set_user_attr('Jobs', [list(job) for job in self.pipeline.jobs(trial_samples)])
+            trials.append((trial, trial_samples))
+            samples += trial_samples
+
+        self.pipeline.run(samples, callback=lambda sample: self.tracer.sample(int(sample.group), sample))
+        self.clean()
+        self.save_tuning()
+        self.sync_artifacts(study)
+
+        evaluations = list()
+        for trial, trial_samples in trials:
+            results = [sample.result for sample in trial_samples]
+            start_time = time.time()
+            err_mean = self.score(results)
+            jobs = self.pipeline.jobs(trial_samples)
+            if np.isnan(err_mean):
+                self.record(trial, 'FAIL', None, trial_samples)
+                trial.set_user_attr('Failures', {sample.name: sample.failure for sample in trial_samples
+                                                 if sample.failure is not None})
+                study.tell(trial, state=optuna.trial.TrialState.FAIL)
+                self.artifact_manager.register(str(trial.number), float('inf'), jobs)
+            else:
+                self.record(trial, 'COMPLETE', err_mean, trial_samples, time.time() - start_time)
+                trial.set_user_attr('Results', self.error_engine.to_json(results))
+                trial.set_user_attr('Solve time', sum(sample.times.get('solve', 0.0) for sample in trial_samples))
+                study.tell(trial, err_mean)
+                self.artifact_manager.register(str(trial.number), err_mean, jobs)
+            evaluations.append((err_mean, results))
+
+        return evaluations
+
+    def optimize_refine(self,
+                        study:optuna.Study) -> None:
+        '''
+        Levenberg-Marquardt refinement
+        The best trial is refined on the residuals of all samples and outputs. Every iteration
+        simulates the finite-difference Jacobian as one batch of perturbed trials, then a batch
+        of steps with several damping factors, and moves to the best step if it lowers the error.
+        Steps minimize the sum of squared residuals, which matches the error for the l2 norm
+        with rms aggregate, and is accepted on the error itself otherwise.
+
+        Args:
+            study: optuna.Study, optimization study
+
+        Raises:
+            ThresholdExceeded: if the error threshold is reached
+        '''
+
+        best_trial = self.best_trial(study)
+        if best_trial is None or 'Results' not in best_trial.user_attrs \
+            or self.count_trials(study) >= self.max_trials:
+            return
+        print('{:-^70s}'.format(' REFINEMENT STARTED '))
+        refiner = Refiner(bounds=self.opt_params)
+        x = refiner.to_unit(best_trial.params)
+        err = best_trial.value
+        residuals = self.error_engine.residuals(self.error_engine.to_array(best_trial.user_attrs['Results'])).ravel()
+        start_time = time.time()
+        iteration = 0
+        jacobian = None
+        while time.time() - start_time < self.max_time:
+            if jacobian is None:
+                # Jacobian at the current point
+                points, steps = refiner.perturb(x)
+                if self.count_trials(study) + len(points) > self.max_trials:
+                    break
+                evaluations = self.evaluate(study,
+                                            [refiner.from_unit(point) for point in points],
+                                            'Jacobian ' + str(iteration))
+                jacobian = refiner.jacobian(residuals,
+                                            [self.error_engine.residuals(self.error_engine.to_array(results)).ravel()
+                                             for _, results in evaluations],
+                                            steps)
+
+            # Damped steps from the current point
+            points, dampings = refiner.propose(x, residuals, jacobian)
+            if not points or refiner.converged(x, points) \
+                or self.count_trials(study) + len(points) > self.max_trials:
+                break
+            evaluations = self.evaluate(study,
+                                        [refiner.from_unit(point) for point in points],
+                                        'Step ' + str(iteration))
+            errs = np.array([step_err for step_err, _ in evaluations])
+            errs = np.where(np.isnan(errs), np.inf, errs)
+            if np.min(errs) < err:
+                best = int(np.argmin(errs))
+                x = points[best]
+                err = float(errs[best])
+                residuals = self.error_engine.residuals(self.error_engine.to_array(evaluations[best][1])).ravel()
+                refiner.update(dampings[best])
+                jacobian = None
+                iteration += 1
+                print('Refinement:', iteration, 'Error:', err)
+                print('Parameters:', refiner.from_unit(x))
+                if err < self.err_threshold:
+                    raise ThresholdExceeded()
+            else:
+                refiner.update()
+
+    def correction(self,
+                   level:int) -> np.ndarray:
+        '''
+        Correction of the outputs from a fidelity level to full fidelity
+        The correction from level l to l + 1 is the mean difference of the outputs of
+        the same parameters at both levels, and the corrections are chained up to full fidelity.
+
+        Args:
+            level: int, fidelity level
+
+        Returns:
+            correction: np.ndarray, correction added to the outputs, shape (samples, outputs)
+        '''
+
+        correction = np.zeros(self.error_engine.targets.shape)
+        for pairs in self.pairs[level:-1]:
+            diffs = [high - low for low, high in pairs if np.all(np.isfinite(high - low))]
+            if diffs:
+                correction += np.mean(diffs, axis=0)
+
+        return correction
+
+    def discrepancy(self,
+                    level:int) -> float:
+        '''
+        Error discrepancy between a corrected fidelity level and the next one
+
+        Args:
+            level: int, fidelity level
+
+        Returns:
+            discrepancy: float, mean absolute difference of the corrected errors of the pairs,
+                0 with less than two pairs
+        '''
+
+        pairs = [(low, high) for low, high in self.pairs[level] if np.all(np.isfinite(high - low))]
+        if len(pairs) < 2:
+            return 0.0
+        lows = np.array([low for low, _ in pairs]) + self.correction(level)
+        highs = np.array([high for _, high in pairs]) + self.correction(level + 1)
+
+        return float(np.mean(np.abs(self.error_engine.score(highs) - self.error_engine.score(lows))))
+
+    def update_fidelity(self,
+                        errs:list,
+                        remaining:int) -> None:
+        '''
+        Promote the population to the next fidelity level
+        The population is promoted when the corrected errors of a generation spread less than
+        the discrepancy to the next level, so that the level can no longer rank the candidates,
+        when the best error has not improved for fidelity_patience generations,
+        when the error threshold is reached, or when the remaining trials only cover
+        one generation per remaining level.
+
+        Args:
+            errs: list, corrected errors of the trials of the last generation
+            remaining: int, number of remaining trials
+        '''
+
+        errs = np.array([err for err in errs if np.isfinite(err)])
+        if self.level == len(self.fidelities) - 1 or not errs.size:
+            return
+        if np.min(errs) < self.level_best * (1 - 1e-3):
+            self.level_best = float(np.min(errs))
+            self.level_stall = 0
+        else:
+            self.level_stall += 1
+        if np.std(errs) <= self.discrepancy(self.level) \
+            or self.level_stall >= self.fidelity_patience \
+            or np.min(errs) < self.err_threshold \
+            or remaining <= self.popsize * (len(self.fidelities) - 1 - self.level):
+            self.level += 1
+            self.level_best = float('inf')
+            self.level_stall = 0
+            print('Fidelity:', self.fidelities[self.level])
+
+    def best_trial(self,
+                   study:optuna.Study) -> optuna.trial.FrozenTrial:
+        '''
+        Best trial at full fidelity
+
+        Args:
+            study: optuna.Study, optimization study
+
+        Returns:
+            trial: optuna.trial.FrozenTrial, best complete trial at full fidelity, None if there is none
+        '''
+
+        trials = [trial for trial in study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,))
+                  if trial.user_attrs.get('Fidelity', 'full') == 'full']
+
+        return min(trials, key=lambda trial: trial.value) if trials else None
+
+    def print_best(self,
+                   study:optuna.Study) -> None:
+        '''
+        Print the best trial
+        The best trial at a lower fidelity is printed while no trial at full fidelity is complete,
+        and nothing but a note while no trial is complete, e.g. on a worker joining after the
+        trial budget was claimed by the others.
+
+        Args:
+            study: optuna.Study, optimization study
+        '''
+
+        best_trial = self.best_trial(study)
+        if best_trial is None:
+            trials = study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,))
+            best_trial = min(trials, key=lambda trial: trial.value) if trials else None
+        if best_trial is None:
+            print('No complete trial yet')
+            return
+        print('Error:', best_trial.value)
+        print('Best parameters:', best_trial.params)
+
+    def update_surrogate(self,
+                         study:optuna.Study) -> bool:
+        '''
+        Add the results of newly completed trials to the surrogate
+
+        Args:
+            study: optuna.Study, optimization study
+
+        Returns:
+            ready: bool, whether the surrogate has enough observations to predict
+        '''
+
+        for trial in study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,)):
+            if trial.number in self.surrogate_trials or 'Results' not in trial.user_attrs:
+                continue
+            outputs = self.error_engine.to_array(trial.user_attrs['Results'])
+            if self.fidelities is not None and trial.user_attrs.get('Fidelity') in self.fidelities:
+                outputs = outputs + self.correction(self.fidelities.index(trial.user_attrs['Fidelity']))
+            self.surrogate.add(trial.params,
+                               outputs)
+            self.surrogate_trials.add(trial.number)
+
+        return self.surrogate.ready
+
+    def restore(self,
+                study:optuna.Study) -> None:
+        '''
+        Restore an interrupted study
+        The artifacts of the finished trials are restored. Trials left running by the
+        interrupted run, and failed trials that ran jobs but recorded no failures, e.g.
+        stopped by an exception, are enqueued again with the same parameters, reusing
+        the results of their exported samples.
+
+        Args:
+            study: optuna.Study, optimization study loaded from the storage
+        '''
+
+        trials = study.get_trials(deepcopy=False)
+        # Trials enqueued again by an earlier resume are not enqueued twice
+        resumed = [trial.user_attrs['Resumed jobs'] for trial in trials if 'Resumed jobs' in trial.user_attrs]
+        for trial in trials:
+            jobs = trial.user_attrs.get('Jobs')
+            if self.fidelities is not None and trial.user_attrs.get('Fidelity') in self.fidelities:
+                self.level = max(self.level, self.fidelities.index(trial.user_attrs['Fidelity']))
+            # Failed trials that ran jobs but recorded no failures were stopped, e.g. by an exception
+            stopped = trial.state == optuna.trial.TrialState.FAIL and jobs \
+                and 'Failures' not in trial.user_attrs and jobs not in resumed
+            if trial.state == optuna.trial.TrialState.RUNNING:
+                print('\033[33mWARNING: TRIAL', trial.number, 'WAS INTERRUPTED\033[0m')
+                study.tell(trial.number, state=optuna.trial.TrialState.FAIL)
+            elif stopped:
+                print('\033[33mWARNING: TRIAL', trial.number, 'WAS STOPPED\033[0m')
+            if (trial.state == optuna.trial.TrialState.RUNNING or stopped) \
+                and len(trial.params) == len(self.opt_params):
+                study.enqueue_trial(trial.params,
+                                    user_attrs={'Resumed jobs': jobs} if jobs else None)
+            if jobs:
+                self.artifact_manager.register(jobs[0][1].rsplit('_', 1)[0],
+                                               trial.value if trial.state == optuna.trial.TrialState.COMPLETE else float('inf'),
+                                               [(path, name) for path, name in jobs])
+        self.finished = self.count_trials(study)
+        print('Finished trials:', self.finished)
+
+    def count_trials(self,
+                     study:optuna.Study) -> int:
+        '''
+        Count simulated trials
+        Trials running on other workers and failed trials that ran jobs are counted, so that
+        failures take from the budget as in sequential mode, where every trial takes one of
+        n_trials. Trials rejected by the surrogate or outside the budget ran no jobs and are not.
+
+        Args:
+            study: optuna.Study, optimization study
+
+        Returns:
+            n_trials: int, number of simulated trials
+        '''
+
+        states = (optuna.trial.TrialState.RUNNING,
+                  optuna.trial.TrialState.COMPLETE,
+                  optuna.trial.TrialState.PRUNED,
+                  optuna.trial.TrialState.FAIL)
+
+        return sum(1 for trial in study.get_trials(deepcopy=False, states=states) if 'Jobs' in trial.user_attrs)
+
+    def claim(self,
+              study:optuna.Study,
+              trial:optuna.Trial) -> bool:
+        '''
+        Check if a trial just asked fits in the trial budget shared by all workers
+        Trials asked by several workers at the same time are ranked by trial number.
+
+        Args:
+            study: optuna.Study, optimization study
+            trial: optuna.Trial, trial just asked
+
+        Returns:
+            claimed: bool, whether the trial is within the budget
+        '''
+
+        states = (optuna.trial.TrialState.RUNNING,
+                  optuna.trial.TrialState.COMPLETE,
+                  optuna.trial.TrialState.PRUNED,
+                  optuna.trial.TrialState.FAIL)
+        claimed = sorted(other.number for other in study.get_trials(deepcopy=False, states=states)
+                         if 'Jobs' in other.user_attrs or other.state == optuna.trial.TrialState.RUNNING)
+
+        return claimed.index(trial.number) < self.max_trials
+
+    def check_trials(self,
+                     study:optuna.Study,
+                     trial:optuna.trial.FrozenTrial) -> None:
+        if self.study_name is not None and self.count_trials(study) >= self.max_trials:
+            study.stop()
+
+    def check_stagnation(self,
+                         study:optuna.Study,
+                         trial:optuna.trial.FrozenTrial) -> None:
+        if self.refine and self.best_trial(study) is not None and self.stagnated(study):
+            study.stop()
+
     def check_threshold(self, 
                         study, 
                         trial):
-        if study.best_value < self.err_threshold:
+        # Failed trials have no value, so the study may have no best value yet
+        best_trial = self.best_trial(study)
+        if best_trial is not None and best_trial.value < self.err_threshold:
             raise ThresholdExceeded()
 
     def run(self) -> None:
@@ -263,10 +1299,48 @@ class EVOMIA:
         '''
 
         print('{:-^70s}'.format(' OPTIMIZATION STARTED '))
-        # Create study
-        study = optuna.create_study(storage='sqlite:///databoard.sqlite3',
-                                    study_name=self.opt_name,
-                                    sampler=optuna.samplers.CmaEsSampler())
+        # Connect storage, a journal file needs no database locking and can be shared over a network filesystem
+        if '://' in self.storage:
+            storage = self.storage
+        else:
+            storage = optuna.storages.JournalStorage(optuna.storages.JournalFileStorage(self.storage))
+
+        # Seed the sampler from a previous study
+        source = None
+        if self.warm_start is not None:
+            source = optuna.load_study(storage=storage,
+                                       study_name=self.warm_start)
+            try:
+                if source.user_attrs.get('Optimization parameters') != list(self.opt_params.keys()):
+                    raise ValueError('\033[31mERROR: WARM START PARAMETERS DO NOT MATCH !!!\033[0m')
+                if not source.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,)):
+                    raise ValueError('\033[31mERROR: WARM START STUDY HAS NO COMPLETE TRIAL !!!\033[0m')
+            except ValueError as e:
+                print(e)
+                sys.exit()
+        sampler = optuna.samplers.CmaEsSampler(popsize=self.popsize,
+                                               consider_pruned_trials=self.pruner is not None,
+                                               source_trials=source.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,)) if source is not None else None)
+
+        # Create or load study
+        if self.resume is not None:
+            study = optuna.load_study(storage=storage,
+                                      study_name=self.opt_name,
+                                      sampler=sampler,
+                                      pruner=self.pruner)
+            self.restore(study)
+        else:
+            study = optuna.create_study(storage=storage,
+                                        study_name=self.opt_name,
+                                        sampler=sampler,
+                                        pruner=self.pruner,
+                                        load_if_exists=self.study_name is not None)
+            if self.study_name is not None:
+                self.finished = self.count_trials(study)
+                print('Finished trials:', self.finished)
+            if source is not None and not study.get_trials(deepcopy=False):
+                # Start from the best parameters of the previous study
+                study.enqueue_trial(source.best_params)
         
         # Set user attributes
         study.set_user_attr('Optimization parameters', 
@@ -281,19 +1355,40 @@ class EVOMIA:
                             self.err_threshold)
 
         # Start optimization
+        self.study = study
         try:
-            study.optimize(self.objective, 
-                        n_trials=self.max_trials,
-                        timeout=self.max_time,
-                        callbacks=[self.check_threshold])
+            if self.parallel:
+                self.optimize_parallel(study)
+            else:
+                study.optimize(self.objective, 
+                            n_trials=max(0, self.max_trials - self.finished),
+                            timeout=self.max_time,
+                            callbacks=[self.check_threshold, self.check_trials, self.check_stagnation])
+            if self.refine:
+                self.optimize_refine(study)
             print('{:-^70s}'.format(' OPTIMIZATION FINISHED '))
-            print('Error:', study.best_value)
-            print('Best parameters:', study.best_params)
+            self.print_best(study)
         except ThresholdExceeded:
             print('{:-^70s}'.format(' THRESHOLD EXCEEDED '))
             print('{:-^70s}'.format(' OPTIMIZATION FINISHED '))
-            print('Error:', study.best_value)
-            print('Best parameters:', study.best_params)
+            self.print_best(study)
+        finally:
+            # Solver jobs run in their own sessions, Ctrl-C does not reach them
+            self.scheduler.shutdown(owner=self.opt_name if self.shared else None)
+            self.export_scheduler.shutdown()
+            if self.export_pool is not None:
+                self.export_pool.close()
+            if self.result_cache is not None:
+                print('Cache statistics:', self.result_cache.stats())
+                study.set_user_attr('Cache statistics', 
+                                    self.result_cache.stats())
+            if self.surrogate is not None:
+                cost = {'Fit time': self.surrogate.fit_time,
+                        'Predict time': self.surrogate.predict_time,
+                        'Solve time': sum(trial.user_attrs.get('Solve time', 0.0) for trial in study.get_trials(deepcopy=False))}
+                print('Surrogate cost:', cost)
+                study.set_user_attr('Surrogate cost', 
+                                    cost)
 
 if __name__ == '__main__':
     # Parameters
@@ -304,6 +1399,47 @@ if __name__ == '__main__':
     max_time = 36000
     err_threshold = 1e-3
     batch_size = 8
+    cpus = 4
+    cpu_budget = None
+    write_ahead = None
+    export_jobs = 2
+    export_server = True
+    export_timeout = 600
+    compiled = True
+    parallel = False
+    popsize = None
+    pruner = None
+    cache_path = 'data/cache/'
+    cache_tolerance = 1e-6
+    cache_size = 2**30
+    surrogate = False
+    screening_factor = 4
+    err_scale = None
+    err_weight = None
+    err_norm = 'l2'
+    err_aggregate = 'mean'
+    keep_top_k = 10
+    disk_quota = None
+    compress = True
+    resume = None
+    warm_start = None
+    storage = 'sqlite:///databoard.sqlite3'
+    study_name = None
+    label = None
+    trace = True
+    fidelities = None
+    fidelity_patience = 3
+    packed = False
+    auto_tune = False
+    tune_cpus = None
+    refine = False
+    refine_patience = 3
+    timeout = None
+    timeout_factor = 3.0
+    field_neighbors = 4
+    scheduler = None
+    priority = 1.0
+    progress = True
 
     # Initialize auto optimization
     opt = EVOMIA(obj_name=obj_name,
@@ -312,7 +1448,48 @@ if __name__ == '__main__':
                  max_trials=max_trials,
                  max_time=max_time,
                  err_threshold=err_threshold,
-                 batch_size=batch_size)
+                 batch_size=batch_size,
+                 cpus=cpus,
+                 cpu_budget=cpu_budget,
+                 write_ahead=write_ahead,
+                 export_jobs=export_jobs,
+                 export_server=export_server,
+                 export_timeout=export_timeout,
+                 compiled=compiled,
+                 parallel=parallel,
+                 popsize=popsize,
+                 pruner=pruner,
+                 cache_path=cache_path,
+                 cache_tolerance=cache_tolerance,
+                 cache_size=cache_size,
+                 surrogate=surrogate,
+                 screening_factor=screening_factor,
+                 err_scale=err_scale,
+                 err_weight=err_weight,
+                 err_norm=err_norm,
+                 err_aggregate=err_aggregate,
+                 keep_top_k=keep_top_k,
+                 disk_quota=disk_quota,
+                 compress=compress,
+                 resume=resume,
+                 warm_start=warm_start,
+                 storage=storage,
+                 study_name=study_name,
+                 label=label,
+                 trace=trace,
+                 fidelities=fidelities,
+                 fidelity_patience=fidelity_patience,
+                 packed=packed,
+                 auto_tune=auto_tune,
+                 tune_cpus=tune_cpus,
+                 refine=refine,
+                 refine_patience=refine_patience,
+                 timeout=timeout,
+                 timeout_factor=timeout_factor,
+                 field_neighbors=field_neighbors,
+                 scheduler=scheduler,
+                 priority=priority,
+                 progress=progress)
     
     # Run optimization
     opt.run()
\ No newline at end of file
@@ -1,2 +1,13 @@
 from .inp_writer import InpWriter
-from .json_reader import JsonReader
\ No newline at end of file
+from .json_reader import JsonReader
+from .job_scheduler import Job, JobScheduler
+from .export_pool import ExportRequest, ExportWorker, ExportPool
+from .result_cache import ResultCache
+from .pipeline import Sample, Pipeline
+from .surrogate import Surrogate
+from .error_engine import ErrorEngine
+from .artifact_manager import ArtifactManager
+from .tracer import Tracer
+from .auto_tuner import AutoTuner
+from .refiner import Refiner
+from .field_mapper import FieldMapper
\ No newline at end of file
@@ -0,0 +1,214 @@
+# -*- coding=utf-8 -*-
+
+# ------------------------------------------------------------------
+# File Name:        artifact_manager.py
+# Author:           agent
+# Version:          1.0.0
+# Created:          2026/10/17
+# Description:      This is a script to clean up Abaqus artifacts of
+#                   trials and keep the optimization path bounded.
+# Function List:    None
+# History:
+#       <author>        <version>       <time>      <desc>
+#       agent           1.0.0           2026/10/17  Created file
+# ------------------------------------------------------------------
+
+import os
+import sys
+import gzip
+import shutil
+
+class ArtifactManager:
+    # Solver scratch files, not needed once the result is exported
+    scratch = ['.dat', '.msg', '.sta', '.com', '.prt', '.sim', '.log', '.lck', '.ipm',
+               '.023', '.mdl', '.stt', '.res', '.abq', '.pac', '.sel', '.fil', '.cid']
+
+    def __init__(self,
+                 keep_top_k:int=10,
+                 quota:int=None,
+                 compress:bool=True) -> None:
+        '''
+        Artifact manager class
+        This class is designed to delete solver scratch files as soon as a sample's
+        result is extracted, keep full odb files only for the best trials, and
+        keep the artifacts of a study below a disk quota.
+
+        Args:
+            keep_top_k: int, number of best trials whose odb files are kept
+            quota: int, maximum size of the artifacts in bytes, default unlimited
+            compress: bool, compress input files with gzip instead of keeping them as text
+        '''
+
+        # Check if the input parameters are valid
+        try:
+            if keep_top_k < 0:
+                raise ValueError('\033[31mERROR: KEEP TOP K IS NOT VALID !!!\033[0m')
+        except ValueError as e:
+            print(e)
+            sys.exit()
+
+        self.keep_top_k = keep_top_k
+        self.quota = quota
+        self.compress = compress
+        self.trials = dict()
+        self.kept = set()
+
+    def _remove(self,
+                file:str) -> int:
+        try:
+            size = os.path.getsize(file)
+            os.remove(file)
+        except OSError:
+            return 0
+
+        return size
+
+    def scan(self) -> dict:
+        '''
+        Scan artifacts of the registered trials
+        Every working directory is listed once.
+
+        Returns:
+            files: dict, list of (file, size) by (path, job name)
+        '''
+
+        jobs = set(job for _, trial_jobs in self.trials.values() for job in trial_jobs)
+        files = {job: list() for job in jobs}
+        for path in set(path for path, _ in jobs):
+            try:
+                entries = list(os.scandir(path))
+            except OSError:
+                continue
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                # Artifacts are name.ext or name_output_*.npy
+                parts = entry.name.split('.')[0].split('_')
+                for n in range(len(parts), 0, -1):
+                    if (path, '_'.join(parts[:n])) in files:
+                        files[(path, '_'.join(parts[:n]))].append((entry.path, entry.stat().st_size))
+                        break
+
+        return files
+
+    def release(self,
+                path:str,
+                name:str) -> None:
+        '''
+        Release one job after its result is extracted
+        Scratch files are deleted and the input file is compressed.
+
+        Args:
+            path: str, working directory
+            name: str, job name
+        '''
+
+        for ext in self.scratch:
+            self._remove(path + name + ext)
+        if self.compress and os.path.exists(path + name + '.inp'):
+            with open(path + name + '.inp', 'rb') as f_in, gzip.open(path + name + '.inp.gz', 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+            self._remove(path + name + '.inp')
+
+    def register(self,
+                 trial:str,
+                 err:float,
+                 jobs:list) -> None:
+        '''
+        Register a scored trial
+        Odb files are kept only for the best keep_top_k trials, then the quota is enforced.
+        Pruned and failed trials should be registered with an infinite error.
+
+        Args:
+            trial: str, trial name
+            err: float, trial error
+            jobs: list, (path, name) of every job of the trial
+        '''
+
+        self.trials[trial] = (err if err == err else float('inf'), jobs)
+        self._rank({trial})
+
+    def sync(self,
+             trials:dict) -> None:
+        '''
+        Merge the scored trials of other workers sharing the study
+        Odb files are then kept only for the best keep_top_k trials of all workers,
+        and the quota is enforced on the artifacts of all of them.
+
+        Args:
+            trials: dict, (err, jobs) of every scored trial by trial name
+        '''
+
+        new = set(trials.keys()) - set(self.trials.keys())
+        for trial, (err, jobs) in trials.items():
+            self.trials[trial] = (err if err == err else float('inf'), jobs)
+        self._rank(new)
+
+    def _rank(self,
+              new:set) -> None:
+        ranked = sorted(self.trials.keys(), key=lambda key: self.trials[key][0])
+        kept = set(ranked[:self.keep_top_k])
+        for key in ranked[self.keep_top_k:]:
+            # Only trials kept so far or just registered may still hold odb files
+            if key in self.kept or key in new:
+                for path, name in self.trials[key][1]:
+                    self._remove(path + name + '.odb')
+        self.kept = kept
+        self.enforce()
+
+    def size(self) -> int:
+        '''
+        Total size of the registered artifacts
+
+        Returns:
+            size: int, size in bytes
+        '''
+
+        return sum(size for files in self.scan().values() for _, size in files)
+
+    def enforce(self) -> None:
+        '''
+        Enforce the disk quota
+        Artifacts of the worst trials are deleted first, odb files before results.
+        '''
+
+        if self.quota is None:
+            return
+        files = self.scan()
+        size = sum(file_size for job_files in files.values() for _, file_size in job_files)
+        ranked = sorted(self.trials.keys(), key=lambda key: self.trials[key][0], reverse=True)
+        for odb_only in [True, False]:
+            for key in ranked:
+                if size <= self.quota:
+                    return
+                for job in self.trials[key][1]:
+                    for file, file_size in files.get(job, list()):
+                        if not odb_only or file.endswith('.odb'):
+                            size -= self._remove(file)
+
+if __name__ == '__main__':
+    # Test artifact_manager
+    print('\033[7m{:=^50s}\033[0m'.format(' ARTIFACT MANAGER'))
+
+    # Parameters
+    print('{:-^50s}'.format(' INITIALIZATION '))
+    path = 'data/artifact_test/'
+    print('Path:', path)
+    keep_top_k = 1
+    print('Keep top k:', keep_top_k)
+    os.makedirs(path, exist_ok=True)
+    for name in ['1_0', '2_0']:
+        for ext in ['.inp', '.odb', '.msg', '.sta', '.json']:
+            with open(path + name + ext, 'w') as f:
+                f.write(name * 100)
+
+    # Release and register trials
+    print('{:-^50s}'.format(' TEST START '))
+    artifact_manager = ArtifactManager(keep_top_k=keep_top_k)
+    for trial, err in [('1', 2.0), ('2', 1.0)]:
+        artifact_manager.release(path, trial + '_0')
+        artifact_manager.register(trial, err, [(path, trial + '_0')])
+    print('Files:', sorted(os.listdir(path)))
+    print('Size:', artifact_manager.size())
+    shutil.rmtree(path)
+    print('{:-^50s}'.format(' TEST PASSED '))
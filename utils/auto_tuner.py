@@ -0,0 +1,272 @@
+# -*- coding=utf-8 -*-
+
+# ------------------------------------------------------------------
+# File Name:        auto_tuner.py
+# Author:           agent
+# Version:          1.0.0
+# Created:          2026/10/17
+# Description:      This is a script to tune the number of cpus per
+#                   solver job and the number of concurrent jobs from
+#                   measured solve times.
+# Function List:    None
+# History:
+#       <author>        <version>       <time>      <desc>
+#       agent           1.0.0           2026/10/17  Created file
+# ------------------------------------------------------------------
+
+import sys
+import time
+import numpy as np
+from collections import deque
+
+class AutoTuner:
+    def __init__(self,
+                 cpu_budget:int,
+                 candidates:list=None,
+                 probes:int=2,
+                 drift:float=0.3,
+                 window:int=8,
+                 max_jobs:int=None) -> None:
+        '''
+        Auto tuner class
+        This class is designed to measure the throughput of the cpu budget at several cpus
+        per job, and pick the cpus per job with the most samples per hour. Candidates are
+        measured one after another, each at the concurrency it would run at, i.e.
+        n(c) = min(cpu_budget // c, max_jobs) jobs of c cpus, so that the solve times include
+        the contention between concurrent jobs, and the throughput is n(c) / t(c).
+        The scaling curve t(c) = serial + parallel / c is fitted for reference only.
+        The tuning is repeated when the solve times of the chosen cpus drift away
+        from the measured ones.
+
+        Args:
+            cpu_budget: int, total number of cpus shared by all solver jobs
+            candidates: list, cpus per job to be measured, default powers of 2 up to the cpu budget
+            probes: int, minimum number of solve times measured per candidate, at least enough
+                jobs to fill the cpu budget once
+            drift: float, relative deviation of the recent solve times from the measured ones triggering a new tuning
+            window: int, number of recent solve times compared with the measured ones
+            max_jobs: int, maximum number of concurrent jobs the run can reach, e.g. the samples of
+                one trial in sequential mode, default unlimited
+        '''
+
+        if candidates is None:
+            candidates = [2 ** n for n in range(int(np.log2(cpu_budget)) + 1)]
+
+        # Check if the input parameters are valid
+        try:
+            if cpu_budget < 1:
+                raise ValueError('\033[31mERROR: CPU BUDGET IS NOT VALID !!!\033[0m')
+            if not candidates or min(candidates) < 1 or max(candidates) > cpu_budget:
+                raise ValueError('\033[31mERROR: CPU CANDIDATES ARE NOT VALID !!!\033[0m')
+            if probes < 1:
+                raise ValueError('\033[31mERROR: PROBES IS NOT VALID !!!\033[0m')
+            if max_jobs is not None and max_jobs < 1:
+                raise ValueError('\033[31mERROR: MAX JOBS IS NOT VALID !!!\033[0m')
+        except ValueError as e:
+            print(e)
+            sys.exit()
+
+        self.cpu_budget = cpu_budget
+        self.candidates = sorted(set(candidates))
+        self.probes = probes
+        self.drift = drift
+        self.max_jobs = max_jobs
+        self.times = {cpus: list() for cpus in self.candidates}
+        self.pending = {cpus: 0 for cpus in self.candidates}
+        self.recent = deque(maxlen=window)
+        self.cpus = None
+        self.fit = None
+        self.throughput = None
+        self.history = list()
+
+    @property
+    def jobs(self) -> int:
+        '''
+        Number of concurrent jobs of the chosen cpus, None while measuring
+        '''
+
+        return int(self.concurrency(self.cpus)) if self.cpus is not None else None
+
+    def concurrency(self,
+                    cpus):
+        '''
+        Number of concurrent jobs of c cpus under the cpu budget and the job limit
+
+        Args:
+            cpus: int or np.ndarray, number of cpus
+
+        Returns:
+            jobs: int or np.ndarray, number of concurrent jobs
+        '''
+
+        jobs = self.cpu_budget // cpus
+
+        return np.minimum(jobs, self.max_jobs) if self.max_jobs is not None else jobs
+
+    def quota(self,
+              cpus:int) -> int:
+        '''
+        Number of solve times measured at a candidate
+
+        Args:
+            cpus: int, number of cpus
+
+        Returns:
+            quota: int, number of solve times
+        '''
+
+        return max(self.probes, int(self.concurrency(cpus)))
+
+    def next_cpus(self) -> int:
+        '''
+        Cpus of the next solver job
+        While measuring, the first candidate short of its quota of measured and running jobs
+        is returned, so that the jobs of a candidate run together at its own concurrency.
+
+        Returns:
+            cpus: int, number of cpus
+        '''
+
+        if self.cpus is not None:
+            return self.cpus
+        cpus = next((cpus for cpus in self.candidates
+                     if len(self.times[cpus]) + self.pending[cpus] < self.quota(cpus)), self.candidates[-1])
+        self.pending[cpus] += 1
+
+        return cpus
+
+    def record(self,
+               cpus:int,
+               solve_time:float=None) -> bool:
+        '''
+        Record the solve time of one sample
+
+        Args:
+            cpus: int, number of cpus of the job
+            solve_time: float, solve time of one sample in seconds, None if the job failed
+
+        Returns:
+            tuned: bool, whether the cpus per job changed
+        '''
+
+        if cpus not in self.times:
+            return False
+        if self.cpus is None:
+            self.pending[cpus] = max(0, self.pending[cpus] - 1)
+        if solve_time is None:
+            return False
+        if self.cpus is None:
+            self.times[cpus].append(solve_time)
+            if all(len(self.times[cpus]) >= self.quota(cpus) for cpus in self.candidates):
+                self.tune()
+                return True
+        elif cpus == self.cpus:
+            self.recent.append(solve_time)
+            measured = float(np.median(self.times[self.cpus]))
+            if len(self.recent) == self.recent.maxlen \
+                and abs(np.median(self.recent) / measured - 1) > self.drift:
+                # Measure all candidates again
+                self.history.append({'time': time.time(),
+                                     'event': 'drift',
+                                     'cpus': self.cpus,
+                                     'measured': measured,
+                                     'recent': float(np.median(self.recent))})
+                self.times = {cpus: list() for cpus in self.candidates}
+                self.pending = {cpus: 0 for cpus in self.candidates}
+                self.recent.clear()
+                self.cpus = None
+                return True
+
+        return False
+
+    def predict(self,
+                cpus) -> np.ndarray:
+        '''
+        Predict solve time from the fitted scaling curve
+
+        Args:
+            cpus: int or np.ndarray, number of cpus
+
+        Returns:
+            solve_time: np.ndarray, solve time in seconds
+        '''
+
+        return self.fit[0] + self.fit[1] / np.asarray(cpus, dtype=float)
+
+    def tune(self) -> int:
+        '''
+        Choose the cpus per job with the most measured samples per hour
+        The scaling curve is fitted to the measured solve times and saved along.
+
+        Returns:
+            cpus: int, chosen number of cpus per job
+        '''
+
+        cpus = np.array(self.candidates, dtype=float)
+        times = np.array([np.median(self.times[int(c)]) for c in cpus])
+        if len(cpus) > 1:
+            self.fit = np.linalg.lstsq(np.stack([np.ones_like(cpus), 1 / cpus], axis=1), times, rcond=None)[0]
+            self.fit = np.maximum(self.fit, 0.0)
+        else:
+            self.fit = np.array([0.0, times[0] * cpus[0]])
+        throughput = self.concurrency(cpus) / np.maximum(times, 1e-9) * 3600
+        self.throughput = {str(int(c)): float(value) for c, value in zip(cpus, throughput)}
+        self.cpus = self.candidates[int(np.argmax(throughput))]
+        self.recent.clear()
+        self.history.append({'time': time.time(),
+                             'event': 'tune',
+                             'basis': 'measured samples per hour at min(cpu_budget // cpus, max_jobs) concurrent jobs',
+                             'cpus': self.cpus,
+                             'jobs': self.jobs,
+                             'samples per hour': float(np.max(throughput)),
+                             'throughput': self.throughput,
+                             'fit': self.fit.tolist(),
+                             'measurements': {str(c): list(self.times[c]) for c in self.candidates}})
+
+        return self.cpus
+
+    def summary(self) -> dict:
+        '''
+        Summary of the tuning, saved in the configuration of the study
+
+        Returns:
+            summary: dict, chosen configuration, its basis, fitted curve and measurements
+        '''
+
+        return {'CPUs per job': self.cpus,
+                'Concurrent jobs': self.jobs,
+                'Basis': 'Measured samples per hour at min(cpu_budget // cpus, max_jobs) concurrent jobs',
+                'Samples per hour': self.throughput,
+                'Serial time': float(self.fit[0]) if self.fit is not None else None,
+                'Parallel time': float(self.fit[1]) if self.fit is not None else None,
+                'Measurements': {str(cpus): times for cpus, times in self.times.items()},
+                'History': self.history}
+
+if __name__ == '__main__':
+    # Test auto_tuner
+    print('\033[7m{:=^50s}\033[0m'.format(' AUTO TUNER'))
+
+    # Parameters
+    print('{:-^50s}'.format(' INITIALIZATION '))
+    cpu_budget = 16
+    print('CPU budget:', cpu_budget)
+    serial, parallel, contention = 20.0, 120.0, 3.0
+    print('Scaling curve:', serial, '+', parallel, '/ c')
+    print('Contention:', contention)
+
+    def solve_time(cpus):
+        # Concurrent jobs compete for the memory bandwidth
+        return (serial + parallel / cpus) * (1 + contention * (cpu_budget // cpus - 1) / (cpu_budget - 1))
+
+    # Measure, tune and re-tune after drift
+    print('{:-^50s}'.format(' TEST START '))
+    auto_tuner = AutoTuner(cpu_budget=cpu_budget)
+    while auto_tuner.cpus is None:
+        cpus = auto_tuner.next_cpus()
+        auto_tuner.record(cpus, solve_time(cpus))
+    print('Tuned:', auto_tuner.cpus, 'cpus x', auto_tuner.jobs, 'jobs')
+    print('Samples per hour:', auto_tuner.throughput)
+    for _ in range(8):
+        auto_tuner.record(auto_tuner.cpus, 2 * solve_time(auto_tuner.cpus))
+    print('Drift:', auto_tuner.cpus is None)
+    print('{:-^50s}'.format(' TEST PASSED '))
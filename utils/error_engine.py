@@ -0,0 +1,214 @@
+# -*- coding=utf-8 -*-
+
+# ------------------------------------------------------------------
+# File Name:        error_engine.py
+# Author:           agent
+# Version:          1.1.0
+# Created:          2026/10/17
+# Description:      This is a script to score simulation results
+#                   against the ground truth with NumPy arrays.
+#                   Support field outputs mapped onto measured points.
+# Function List:    None
+# History:
+#       <author>        <version>       <time>      <desc>
+#       agent           1.0.0           2026/10/17  Created file
+#       agent           1.1.0           2026/10/17  Add field outputs
+# ------------------------------------------------------------------
+
+import sys
+import numpy as np
+
+class ErrorEngine:
+    def __init__(self,
+                 ground_truth:list,
+                 scale:dict=None,
+                 weight:dict=None,
+                 norm:str='l2',
+                 aggregate:str='mean',
+                 mappers:list=None) -> None:
+        '''
+        Error engine class
+        This class is designed to compile the ground truth once into a target matrix
+        (samples x outputs) and score whole trials, or whole generations of trials,
+        in a single vectorized call.
+        The residual of output k is (result - target) / scale[k] * weight[k].
+        A field output takes one column per measured point and component, its ground truth
+        is the values at the measured points and its result is mapped onto them. The points
+        may differ from sample to sample, but not their number.
+
+        Args:
+            ground_truth: list, ground truth samples with "input" and "output" dicts
+            scale: dict, scale of each output, default 1
+            weight: dict, weight of each output, default 1
+            norm: str, norm of the residuals of one sample, 'l2', 'l1' or 'linf'
+            aggregate: str, aggregation of the sample errors, 'mean', 'rms' or 'max'
+            mappers: list, {output: FieldMapper} of the field outputs of every sample, default no field output
+        '''
+
+        # Check if the input parameters are valid
+        try:
+            if not ground_truth:
+                raise ValueError('\033[31mERROR: GROUND TRUTH IS EMPTY !!!\033[0m')
+            self.keys = list(ground_truth[0]["output"].keys())
+            self.sizes = [int(np.size(ground_truth[0]["output"][key])) for key in self.keys]
+            if any([int(np.size(sample["output"].get(key))) for key in self.keys] != self.sizes
+                   for sample in ground_truth):
+                raise ValueError('\033[31mERROR: GROUND TRUTH OUTPUT SIZES DIFFER BETWEEN SAMPLES !!!\033[0m')
+            if norm not in ['l2', 'l1', 'linf']:
+                raise ValueError('\033[31mERROR: NORM IS NOT VALID !!!\033[0m')
+            if aggregate not in ['mean', 'rms', 'max']:
+                raise ValueError('\033[31mERROR: AGGREGATE IS NOT VALID !!!\033[0m')
+        except ValueError as e:
+            print(e)
+            sys.exit()
+
+        self.targets = np.array([np.concatenate([np.ravel(np.asarray(sample["output"][key], dtype=float))
+                                                 for key in self.keys]) for sample in ground_truth])
+        self.scale = np.repeat([float((scale or dict()).get(key, 1.0)) for key in self.keys], self.sizes)
+        self.weight = np.repeat([float((weight or dict()).get(key, 1.0)) for key in self.keys], self.sizes)
+        self.mappers = mappers
+        self.norm = norm
+        self.aggregate = aggregate
+
+    def to_array(self,
+                 results:list) -> np.ndarray:
+        '''
+        Convert results of one trial to an array
+
+        Args:
+            results: list, result dict of every sample, empty or None if the sample has no result
+
+        Returns:
+            outputs: np.ndarray, outputs, shape (samples, outputs), nan for missing results
+        '''
+
+        outputs = np.full(self.targets.shape, np.nan)
+        for num, result in enumerate(results):
+            if result:
+                outputs[num] = np.concatenate([self.value(result, num, key) for key in self.keys])
+
+        return outputs
+
+    def value(self,
+              result:dict,
+              num:int,
+              key:str) -> np.ndarray:
+        '''
+        Output of one sample
+        Field outputs are mapped onto the measured points, unless already
+        mapped {"format": "mapped", "values": values at the points}.
+
+        Args:
+            result: dict, result of the sample
+            num: int, sample number
+            key: str, output name
+
+        Returns:
+            value: np.ndarray, flattened output
+        '''
+
+        value = result[key]
+        if isinstance(value, dict) and value.get('format') == 'mapped':
+            value = value['values']
+        elif self.mappers is not None and key in self.mappers[num]:
+            value = self.mappers[num][key].apply(result, key)
+
+        return np.ravel(np.asarray(value, dtype=float))
+
+    def to_json(self,
+                results:list) -> list:
+        '''
+        Convert results of one trial to json
+        Field outputs are stored mapped onto the measured points.
+
+        Args:
+            results: list, result dict of every sample
+
+        Returns:
+            results: list, json serializable results
+        '''
+
+        if self.mappers is None:
+            return results
+
+        return [{key: {'format': 'mapped',
+                       'values': self.mappers[num][key].apply(result, key).tolist()}
+                 if key in self.mappers[num] and not (isinstance(value, dict) and value.get('format') == 'mapped')
+                 else value
+                 for key, value in result.items()} if result else result
+                for num, result in enumerate(results)]
+
+    def residuals(self,
+                  outputs:np.ndarray) -> np.ndarray:
+        '''
+        Residuals
+
+        Args:
+            outputs: np.ndarray, outputs, shape (..., samples, outputs)
+
+        Returns:
+            residuals: np.ndarray, scaled and weighted residuals, shape (..., samples, outputs)
+        '''
+
+        return (np.asarray(outputs, dtype=float) - self.targets) / self.scale * self.weight
+
+    def sample_errors(self,
+                      outputs:np.ndarray) -> np.ndarray:
+        '''
+        Errors of every sample
+
+        Args:
+            outputs: np.ndarray, outputs, shape (..., samples, outputs)
+
+        Returns:
+            errs: np.ndarray, sample errors, shape (..., samples)
+        '''
+
+        residuals = self.residuals(outputs)
+        if self.norm == 'l2':
+            return np.sqrt(np.sum(residuals ** 2, axis=-1))
+        elif self.norm == 'l1':
+            return np.sum(np.abs(residuals), axis=-1)
+        else:
+            return np.max(np.abs(residuals), axis=-1)
+
+    def score(self,
+              outputs:np.ndarray) -> np.ndarray:
+        '''
+        Score trials
+        A trial with any missing sample scores nan.
+
+        Args:
+            outputs: np.ndarray, outputs, shape (..., samples, outputs)
+
+        Returns:
+            errs: np.ndarray, trial errors, shape (...)
+        '''
+
+        errs = self.sample_errors(outputs)
+        if self.aggregate == 'mean':
+            return np.mean(errs, axis=-1)
+        elif self.aggregate == 'rms':
+            return np.sqrt(np.mean(errs ** 2, axis=-1))
+        else:
+            return np.max(errs, axis=-1)
+
+if __name__ == '__main__':
+    # Test error_engine
+    print('\033[7m{:=^50s}\033[0m'.format(' ERROR ENGINE'))
+
+    # Parameters
+    print('{:-^50s}'.format(' INITIALIZATION '))
+    ground_truth = [{"input": {"u1": 1.0}, "output": {"SOF1": 1.0, "SOF2": 2.0}},
+                    {"input": {"u1": 2.0}, "output": {"SOF1": 2.0, "SOF2": 4.0}}]
+    print('Ground truth:', ground_truth)
+
+    # Score a generation of trials
+    print('{:-^50s}'.format(' TEST START '))
+    error_engine = ErrorEngine(ground_truth=ground_truth)
+    outputs = np.array([error_engine.to_array([{"SOF1": 1.0, "SOF2": 2.0}, {"SOF1": 2.0, "SOF2": 4.0}]),
+                        error_engine.to_array([{"SOF1": 4.0, "SOF2": 6.0}, {"SOF1": 2.0, "SOF2": 4.0}]),
+                        error_engine.to_array([{"SOF1": 1.0, "SOF2": 2.0}, {}])])
+    print('Residuals:', error_engine.residuals(outputs).tolist())
+    print('Errors:', error_engine.score(outputs))
+    print('{:-^50s}'.format(' TEST PASSED '))
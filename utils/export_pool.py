@@ -0,0 +1,395 @@
+# -*- coding=utf-8 -*-
+
+# ------------------------------------------------------------------
+# File Name:        export_pool.py
+# Author:           agent
+# Version:          1.0.0
+# Created:          2026/10/17
+# Description:      This is a script to keep a pool of persistent
+#                   odb export servers and dispatch requests to them.
+# Function List:    None
+# History:
+#       <author>        <version>       <time>      <desc>
+#       agent           1.0.0           2026/10/17  Created file
+# ------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import socket
+import tempfile
+import threading
+import subprocess as sp
+
+class ExportRequest:
+    def __init__(self,
+                 name:str,
+                 path:str,
+                 file:str,
+                 output:str,
+                 group:str=None,
+                 timeout:float=None) -> None:
+        '''
+        Export request class
+        This class is designed to hold one export request and its response.
+
+        Args:
+            name: str, request name
+            path: str, odb path
+            file: str, odb file name
+            output: str, output name
+            group: str, request group, e.g. the trial the request belongs to
+            timeout: float, maximum time to wait for the response in seconds, default timeout of the worker
+        '''
+
+        self.name = name
+        self.path = path
+        self.file = file
+        self.output = output
+        self.group = group
+        self.timeout = timeout
+        self.result = dict()
+        self.message = None
+        self.submit_time = time.time()
+        self.start_time = None
+        self.end_time = None
+
+class ExportWorker:
+    def __init__(self,
+                 command:str,
+                 cwd:str='utils',
+                 timeout:float=600,
+                 request_timeout:float=600) -> None:
+        '''
+        Export worker class
+        This class is designed to start one export server and talk to it over a local socket.
+        A server not answering a request in time is killed, and started again on the next request.
+
+        Args:
+            command: str, server command, ' --server port_file' is appended
+            cwd: str, working directory of the server
+            timeout: float, maximum time to wait for the server to start in seconds
+            request_timeout: float, maximum time to wait for the response to a request in seconds
+        '''
+
+        self.command = command
+        self.cwd = cwd
+        self.timeout = timeout
+        self.request_timeout = request_timeout
+        self.process = None
+        self.connection = None
+        self.rfile = None
+        self.wfile = None
+
+    def start(self) -> None:
+        '''
+        Start export server and connect to it
+        '''
+
+        port_file = os.path.join(tempfile.mkdtemp(), 'port')
+        self.process = sp.Popen(self.command + ' --server ' + port_file,
+                                cwd=self.cwd,
+                                shell=True,
+                                stdout=sp.DEVNULL,
+                                stderr=sp.STDOUT,
+                                start_new_session=True)
+        start_time = time.time()
+        while not os.path.exists(port_file):
+            if self.process.poll() is not None:
+                raise RuntimeError('Export server exited')
+            if time.time() - start_time > self.timeout:
+                self.kill()
+                raise RuntimeError('Export server start timeout')
+            time.sleep(0.1)
+        with open(port_file, 'r') as f:
+            port = int(f.read())
+        os.remove(port_file)
+        os.rmdir(os.path.dirname(port_file))
+
+        self.connection = socket.create_connection(('127.0.0.1', port))
+        self.rfile = self.connection.makefile('rb')
+        self.wfile = self.connection.makefile('wb')
+
+    def export(self,
+               request:ExportRequest) -> None:
+        '''
+        Send export request and wait for the response
+        The worker is (re)started if its server is not running.
+
+        Args:
+            request: ExportRequest, export request
+        '''
+
+        try:
+            if self.process is None or self.process.poll() is not None:
+                self.start()
+            self.connection.settimeout(request.timeout if request.timeout is not None else self.request_timeout)
+            self.wfile.write((json.dumps({'path': request.path,
+                                          'file': request.file,
+                                          'output': request.output}) + '\n').encode('utf-8'))
+            self.wfile.flush()
+            line = self.rfile.readline()
+            if not line:
+                raise RuntimeError('Export server closed')
+            response = json.loads(line.decode('utf-8'))
+        except socket.timeout:
+            # Hung server, e.g. on a corrupt odb
+            self.kill()
+            request.message = 'Export timeout'
+            return
+        except (OSError, RuntimeError, ValueError) as e:
+            self.close()
+            request.message = str(e)
+            return
+
+        if response['status'] == 'ok':
+            request.result = response['result']
+        else:
+            request.message = response['message']
+
+    def close(self) -> None:
+        '''
+        Stop export server
+        '''
+
+        if self.wfile is not None:
+            try:
+                self.wfile.write((json.dumps({'command': 'stop'}) + '\n').encode('utf-8'))
+                self.wfile.flush()
+            except OSError:
+                pass
+            self.rfile.close()
+            self.wfile.close()
+            self.connection.close()
+            self.rfile = self.wfile = self.connection = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=10)
+            except sp.TimeoutExpired:
+                self.kill()
+            self.process = None
+
+    def kill(self) -> None:
+        '''
+        Kill export server with all of its child processes
+        '''
+
+        for file in [self.rfile, self.wfile, self.connection]:
+            if file is not None:
+                try:
+                    file.close()
+                except OSError:
+                    pass
+        self.rfile = self.wfile = self.connection = None
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            if os.name == 'nt':
+                sp.call('taskkill /F /T /PID ' + str(self.process.pid),
+                        stdout=sp.DEVNULL,
+                        stderr=sp.STDOUT)
+            else:
+                try:
+                    os.killpg(os.getpgid(self.process.pid), signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            self.process.wait()
+        self.process = None
+
+class ExportPool:
+    def __init__(self,
+                 size:int=2,
+                 command:str='abaqus cae noGUI=odb_exporter.py --',
+                 cwd:str='utils',
+                 timeout:float=600) -> None:
+        '''
+        Export pool class
+        This class is designed to keep a small pool of persistent export servers,
+        so that the CAE kernel startup is paid once per worker instead of once per odb.
+        Workers are started lazily on the first request.
+
+        Args:
+            size: int, number of export workers
+            command: str, server command, e.g. 'python odb_protocol.py' for the stand-in server
+            cwd: str, working directory of the servers
+            timeout: float, maximum time to wait for the response to a request in seconds,
+                the server is killed and restarted after it
+        '''
+
+        # Check if the input parameters are valid
+        try:
+            if size < 1:
+                raise ValueError('\033[31mERROR: POOL SIZE IS NOT VALID !!!\033[0m')
+        except ValueError as e:
+            print(e)
+            sys.exit()
+
+        self.size = size
+        self.command = command
+        self.cwd = cwd
+        self.timeout = timeout
+        self.requests = queue.Queue()
+        self.responses = queue.Queue()
+        self.workers = list()
+        self.threads = list()
+        self.count = 0
+        self.cancelled = set()
+        self.lock = threading.Lock()
+
+    def _work(self,
+              worker:ExportWorker) -> None:
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            request.start_time = time.time()
+            if request.group is not None and request.group in self.cancelled:
+                request.message = 'cancelled'
+            else:
+                worker.export(request)
+            request.end_time = time.time()
+            self.responses.put(request)
+        worker.close()
+
+    def submit(self,
+               name:str,
+               path:str,
+               file:str,
+               output:str,
+               group:str=None,
+               timeout:float=None) -> ExportRequest:
+        '''
+        Submit export request
+
+        Args:
+            name: str, request name
+            path: str, odb path
+            file: str, odb file name
+            output: str, output name
+            group: str, request group
+            timeout: float, maximum time to wait for the response in seconds, default timeout of the pool
+
+        Returns:
+            request: ExportRequest, submitted request
+        '''
+
+        if not self.threads:
+            for num in range(self.size):
+                worker = ExportWorker(command=self.command,
+                                      cwd=self.cwd,
+                                      request_timeout=self.timeout)
+                thread = threading.Thread(target=self._work,
+                                          args=(worker,),
+                                          daemon=True)
+                thread.start()
+                self.workers.append(worker)
+                self.threads.append(thread)
+
+        request = ExportRequest(name=name,
+                                path=path,
+                                file=file,
+                                output=output,
+                                group=group,
+                                timeout=timeout)
+        with self.lock:
+            self.count += 1
+        self.requests.put(request)
+
+        return request
+
+    def poll(self) -> list:
+        '''
+        Poll finished requests
+
+        Returns:
+            requests: list, requests answered since the last poll
+        '''
+
+        requests = list()
+        while True:
+            try:
+                requests.append(self.responses.get_nowait())
+            except queue.Empty:
+                break
+        with self.lock:
+            self.count -= len(requests)
+
+        return requests
+
+    def cancel(self,
+               group:str) -> None:
+        '''
+        Cancel requests
+        Queued requests of the group are answered without being exported.
+
+        Args:
+            group: str, request group
+        '''
+
+        self.cancelled.add(group)
+
+    def pending(self) -> int:
+        '''
+        Count requests not yet polled
+
+        Returns:
+            count: int, number of pending requests
+        '''
+
+        with self.lock:
+            return self.count
+
+    def close(self) -> None:
+        '''
+        Stop all export workers
+        '''
+
+        for thread in self.threads:
+            self.requests.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.workers = list()
+        self.threads = list()
+
+if __name__ == '__main__':
+    # Test export_pool against the stand-in server
+    print('\033[7m{:=^50s}\033[0m'.format(' EXPORT POOL'))
+
+    # Parameters
+    print('{:-^50s}'.format(' INITIALIZATION '))
+    # Paths are resolved from this file, the servers see odb paths relative to the repository
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    root = os.path.dirname(cwd)
+    path = 'data/example/'
+    print('Odb path:', path)
+    output = 'integrated_force'
+    print('Output:', output)
+    result = {'SOF1': 1.0, 'SOF2': 2.0, 'SOF3': 3.0, 'SOM1': 4.0, 'SOM2': 5.0, 'SOM3': 6.0}
+    print('Result:', result)
+    os.makedirs(os.path.join(root, path), exist_ok=True)
+    for num in range(4):
+        with open(os.path.join(root, path) + 'test_' + str(num) + '.odb', 'w') as f:
+            json.dump(result, f)
+
+    # Export placeholder odb files
+    print('{:-^50s}'.format(' TEST START '))
+    export_pool = ExportPool(size=2,
+                             command=sys.executable + ' odb_protocol.py',
+                             cwd=cwd)
+    for num in range(4):
+        export_pool.submit(name=str(num),
+                           path=path,
+                           file='test_' + str(num) + '.odb',
+                           output=output)
+    while export_pool.pending():
+        for request in export_pool.poll():
+            print('Exported:', request.file, request.result == result)
+        time.sleep(0.1)
+    export_pool.close()
+    for num in range(4):
+        os.remove(os.path.join(root, path) + 'test_' + str(num) + '.odb')
+        os.remove(os.path.join(root, path) + 'test_' + str(num) + '.json')
+    print('{:-^50s}'.format(' TEST PASSED '))
@@ -0,0 +1,253 @@
+# -*- coding=utf-8 -*-
+
+# ------------------------------------------------------------------
+# File Name:        field_mapper.py
+# Author:           agent
+# Version:          1.0.0
+# Created:          2026/10/17
+# Description:      This is a script to map nodal field output onto
+#                   measured points with a sparse weight matrix.
+# Function List:    read_nodes
+# History:
+#       <author>        <version>       <time>      <desc>
+#       agent           1.0.0           2026/10/17  Created file
+# ------------------------------------------------------------------
+
+import os
+import sys
+import hashlib
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.sparse import csr_matrix
+try:
+    from .json_reader import JsonReader
+except ImportError:
+    from json_reader import JsonReader
+
+def read_nodes(template:str,
+               region:str=None) -> tuple:
+    '''
+    Read node coordinates from an input file
+    Nodes of the parts are moved by the translation of their instance.
+    Node labels are assumed unique, i.e. one instance per part.
+
+    Args:
+        template: str, input file
+        region: str, node set of the assembly, default all nodes
+
+    Returns:
+        labels: np.ndarray, sorted node labels
+        coords: np.ndarray, node coordinates, shape (nodes, 3)
+    '''
+
+    with open(template, 'r') as f:
+        lines = f.read().splitlines()
+
+    parts = dict()
+    nodes = dict()
+    node_set = None
+    part = None
+    block = None
+    generate = False
+    for num, line in enumerate(lines):
+        if line.startswith('**'):
+            continue
+        if line.startswith('*'):
+            keyword = line.split(',')[0].strip().lower()
+            options = dict((item.split('=')[0].strip().lower(), item.split('=')[1].strip())
+                           for item in line.split(',')[1:] if '=' in item)
+            block = None
+            if keyword == '*part':
+                part = options['name']
+                parts[part] = dict()
+            elif keyword == '*end part':
+                part = None
+            elif keyword == '*node' and part is not None:
+                block = 'node'
+            elif keyword == '*instance':
+                # A translation may follow the instance line
+                translation = np.zeros(3)
+                if num + 1 < len(lines) and not lines[num + 1].startswith('*'):
+                    translation = np.array([float(value) for value in lines[num + 1].split(',')[:3]])
+                for label, coord in parts.get(options.get('part'), dict()).items():
+                    nodes[label] = coord + translation
+            elif keyword == '*nset' and region is not None and options.get('nset', '').lower() == region.lower():
+                block = 'nset'
+                node_set = list() if node_set is None else node_set
+                generate = 'generate' in line.lower()
+            continue
+        if block == 'node':
+            values = line.split(',')
+            parts[part][int(values[0])] = np.array([float(value) for value in values[1:4]])
+        elif block == 'nset':
+            values = [int(value) for value in line.split(',') if value.strip()]
+            if generate:
+                node_set += list(range(values[0], values[1] + 1, values[2] if len(values) > 2 else 1))
+            else:
+                node_set += values
+
+    # Check if the region is found
+    try:
+        if region is not None and node_set is None:
+            raise ValueError('\033[31mERROR: NODE SET ' + region + ' NOT FOUND !!!\033[0m')
+    except ValueError as e:
+        print(e)
+        sys.exit()
+
+    labels = np.array(sorted(set(node_set) if node_set is not None else nodes.keys()), dtype=np.int64)
+    coords = np.array([nodes[label] for label in labels]).reshape(-1, 3)
+
+    return labels, coords
+
+class FieldMapper:
+    def __init__(self,
+                 template:str,
+                 points:np.ndarray,
+                 region:str=None,
+                 neighbors:int=4,
+                 cache:bool=True) -> None:
+        '''
+        Field mapper class
+        This class is designed to build, once per study, the inverse distance weights from the
+        nearest nodes of the template to every measured point, as a sparse matrix
+        (points x nodes), so that the field output of a trial is mapped onto the measured
+        points with one sparse matrix product. The matrix is cached next to the template,
+        keyed by the content of the template, the region, the neighbors and the points.
+
+        Args:
+            template: str, input file template
+            points: np.ndarray, measured point coordinates, shape (points, 3)
+            region: str, node set of the exported field output, default all nodes
+            neighbors: int, number of nearest nodes interpolated at every point
+            cache: bool, cache the weight matrix next to the template
+        '''
+
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+
+        # Check if the input parameters are valid
+        try:
+            if not os.path.exists(template):
+                raise FileNotFoundError('\033[31mERROR: INP TEMPLATE NOT FOUND !!!\033[0m')
+            if neighbors < 1:
+                raise ValueError('\033[31mERROR: NEIGHBORS IS NOT VALID !!!\033[0m')
+        except (FileNotFoundError, ValueError) as e:
+            print(e)
+            sys.exit()
+
+        self.template = template
+        self.points = points
+        self.region = region
+        self.neighbors = neighbors
+        self.json_reader = JsonReader()
+        self.result_labels = None
+        self.result_weights = None
+
+        with open(template, 'rb') as f:
+            digest = hashlib.sha256(f.read())
+        digest.update(str((region, neighbors)).encode('utf-8'))
+        digest.update(points.tobytes())
+        self.file = os.path.splitext(template)[0] + '_map_' + digest.hexdigest()[:16] + '.npz'
+
+        if cache and os.path.exists(self.file):
+            data = np.load(self.file)
+            self.labels = data['labels']
+            self.weights = csr_matrix((data['data'], data['indices'], data['indptr']), shape=tuple(data['shape']))
+            return
+
+        # Inverse distance weights of the nearest nodes, an exact match takes all the weight
+        self.labels, coords = read_nodes(template, region)
+        k = min(neighbors, len(self.labels))
+        distances, indices = cKDTree(coords).query(points, k=k)
+        distances = distances.reshape(len(points), k)
+        indices = indices.reshape(len(points), k)
+        with np.errstate(divide='ignore'):
+            weights = 1 / distances
+        exact = np.isinf(weights).any(axis=1)
+        weights[exact] = np.isinf(weights[exact])
+        weights /= weights.sum(axis=1, keepdims=True)
+        self.weights = csr_matrix((weights.ravel(), (np.repeat(np.arange(len(points)), k), indices.ravel())),
+                                  shape=(len(points), len(self.labels)))
+        if cache:
+            np.savez(self.file,
+                     labels=self.labels,
+                     data=self.weights.data,
+                     indices=self.weights.indices,
+                     indptr=self.weights.indptr,
+                     shape=np.array(self.weights.shape))
+
+    def map(self,
+            labels:np.ndarray,
+            values:np.ndarray) -> np.ndarray:
+        '''
+        Map nodal values onto the measured points
+        The weights are reordered to the labels of the result once, and reused while the labels do not change.
+        Weights of nodes missing from the result are dropped and the rest renormalized.
+
+        Args:
+            labels: np.ndarray, node labels of the result
+            values: np.ndarray, nodal values, one row per label
+
+        Returns:
+            values: np.ndarray, values at the measured points, shape (points, components)
+        '''
+
+        if self.result_labels is None or not np.array_equal(self.result_labels, labels):
+            labels = np.asarray(labels, dtype=np.int64)
+            position = np.clip(np.searchsorted(self.labels, labels), 0, len(self.labels) - 1)
+            found = self.labels[position] == labels
+            rows = np.full(len(self.labels), -1)
+            rows[position[found]] = np.arange(len(labels))[found]
+            weights = self.weights.tocoo()
+            keep = rows[weights.col] >= 0
+            weights = csr_matrix((weights.data[keep], (weights.row[keep], rows[weights.col[keep]])),
+                                 shape=(len(self.points), len(labels)))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scale = 1 / np.asarray(weights.sum(axis=1)).ravel()
+            self.result_weights = csr_matrix(weights.multiply(scale[:, None]))
+            self.result_labels = np.array(labels)
+
+        return self.result_weights @ np.asarray(values, dtype=float)
+
+    def apply(self,
+              result:dict,
+              output:str) -> np.ndarray:
+        '''
+        Map a field output of a result onto the measured points
+
+        Args:
+            result: dict, result in npy or json format
+            output: str, output name
+
+        Returns:
+            values: np.ndarray, values at the measured points, shape (points, components)
+        '''
+
+        labels, values = self.json_reader.field(result, output)
+
+        return self.map(labels, values)
+
+if __name__ == '__main__':
+    # Test field_mapper
+    print('\033[7m{:=^50s}\033[0m'.format(' FIELD MAPPER'))
+
+    # Parameters
+    print('{:-^50s}'.format(' INITIALIZATION '))
+    template = 'templates/inp/cylinder_linear.inp'
+    print('Template:', template)
+    region = 'SURFACE'
+    print('Region:', region)
+    labels, coords = read_nodes(template, region)
+    print('Nodes:', len(labels))
+    points = coords[:5] + 0.01
+    print('Points:', len(points))
+
+    # Map a linear field near the nodes, inverse distance weights only approximate it
+    print('{:-^50s}'.format(' TEST START '))
+    field_mapper = FieldMapper(template=template,
+                               points=points,
+                               region=region,
+                               cache=False)
+    result = {'U': {'labels': labels, 'values': coords * 0.1}}
+    print('Mapped:', field_mapper.apply(result, 'U')[:2].tolist())
+    print('Linear field:', (points[:2] * 0.1).tolist())
+    print('{:-^50s}'.format(' TEST PASSED '))
@@ -3,7 +3,7 @@
 # ------------------------------------------------------------------
 # File Name:        inp_writer.py
 # Author:           Han Xudong
-# Version:          1.0.1
+# Version:          1.2.0
 # Created:          2024/02/21
 # Description:      This is a script to write input file for Abaqus.
 # Function List:    None
@@ -11,9 +11,12 @@
 #       <author>        <version>       <time>      <desc>
 #       Han Xudong      1.0.0           2024/02/21  Created file
 #       Han Xudong      1.0.1           2024/08/17  Add description
+#       agent           1.1.0           2026/10/17  Add compiled template
+#       agent           1.2.0           2026/10/17  Add packed load cases
 # ------------------------------------------------------------------
 
 import os
+import re
 import sys
 
 class InpWriter:
@@ -28,9 +31,85 @@ class InpWriter:
         '''
 
         self.inp_template = inp_template
-        
-    def write(self, 
-              inp:str, 
+        self.include = None
+        self.segments = None
+        self.slots = None
+
+    def compile(self,
+                keys:list,
+                include:str=None) -> None:
+        '''
+        Compile input file template
+        The template is read once and split into literal segments and
+        placeholder slots, so that each input file is rendered in a single pass.
+        Placeholders are matched as whole words, e.g. `u1` does not match `mu_1`.
+        If include is given, the invariant part of the template (heading excluded,
+        up to the last `*End Assembly` before the first placeholder) is written
+        to include once, and each input file refers to it by `*Include`.
+
+        Args:
+            keys: list, placeholder names
+            include: str, shared include file name
+        '''
+
+        # Check if the input parameters are valid
+        try:
+            if not os.path.exists(self.inp_template):
+                raise FileNotFoundError('\033[31mERROR: INP TEMPLATE NOT FOUND !!!\033[0m')
+            if not keys:
+                raise ValueError('\033[31mERROR: KEYS IS EMPTY !!!\033[0m')
+            if include is not None and not include.endswith('.inp'):
+                raise ValueError('\033[31mERROR: INCLUDE FILE EXTENSION IS NOT VALID !!!\033[0m')
+        except (FileNotFoundError, ValueError) as e:
+            print(e)
+            sys.exit()
+
+        # Read template
+        with open(self.inp_template, 'r') as f:
+            lines = f.read()
+
+        # Longest keys first, so that the alternation never stops at a prefix
+        pattern = re.compile(r'\b(' + '|'.join(re.escape(key) for key in sorted(keys, key=len, reverse=True)) + r')\b')
+        matches = list(pattern.finditer(lines))
+        for key in keys:
+            if key not in [match.group(1) for match in matches]:
+                print('\033[33mWARNING: %s NOT FOUND\033[0m' % key.upper())
+
+        # Split invariant model data into the include file
+        head = ''
+        start = 0
+        self.include = None
+        if include is not None and matches:
+            end_assembly = [match.end() for match in re.finditer(r'^\*End Assembly[^\n]*\n', lines, re.M | re.I)
+                            if match.end() <= matches[0].start()]
+            heading = re.match(r'\*Heading[^\n]*\n(?:(?!\*[^*])[^\n]*\n)*', lines, re.I)
+            if end_assembly:
+                head = heading.group(0) if heading else ''
+                start = end_assembly[-1]
+                # Replace atomically, the include file may be shared by concurrent writers
+                with open(include + '.' + str(os.getpid()) + '.tmp', 'w') as f:
+                    f.write(lines[len(head):start])
+                os.replace(include + '.' + str(os.getpid()) + '.tmp', include)
+                self.include = include
+            else:
+                print('\033[33mWARNING: *END ASSEMBLY NOT FOUND, INCLUDE IS DISABLED\033[0m')
+
+        # Split template into literal segments and placeholder slots
+        self.segments = [head]
+        self.slots = list()
+        if self.include is not None:
+            self.segments.append(None)
+        for match in matches:
+            if match.start() < start:
+                continue
+            self.segments.append(lines[start:match.start()])
+            self.slots.append((len(self.segments), match.group(1)))
+            self.segments.append(match.group(1))
+            start = match.end()
+        self.segments.append(lines[start:])
+
+    def write(self,
+              inp:str,
               parameters:dict) -> None:
         '''
         Write input file for Abaqus
@@ -51,19 +130,108 @@ class InpWriter:
         except (FileNotFoundError, ValueError) as e:
             print(e)
             sys.exit()
-        
-        # Read template
-        with open(self.inp_template, 'r') as f:
-            lines = f.read()
 
         # Write input file
         with open(inp, 'w') as f:
-            for key, value in parameters.items():
-                if key not in lines:
-                    print('\033[33mWARNING: %s NOT FOUND\033[0m' % key.upper())
-                lines = lines.replace(key, str(value))
+            f.write(self.substitute(inp, parameters))
+
+    def write_packed(self,
+                     inp:str,
+                     parameters:list) -> None:
+        '''
+        Write one input file packing several load cases
+        The steps of the template are repeated once per load case and renamed
+        <step>-case-<k>, so one job solves all load cases. The boundary conditions
+        of a step modify those of the previous step, so the cases match separate
+        jobs only for path-independent models, e.g. elastic materials.
+
+        Args:
+            inp: str, input file name
+            parameters: list, parameters of every load case
+        '''
+
+        # Check if the input parameters are valid
+        try:
+            if not inp.endswith('.inp'):
+                raise ValueError('\033[31mERROR: INP FILE EXTENSION IS NOT VALID !!!\033[0m')
+            if not parameters:
+                raise ValueError('\033[31mERROR: PARAMETERS IS EMPTY !!!\033[0m')
+        except ValueError as e:
+            print(e)
+            sys.exit()
+
+        lines = ''
+        for case, case_parameters in enumerate(parameters):
+            deck = self.substitute(inp, case_parameters)
+            step = re.search(r'^\*Step\b', deck, re.M | re.I)
+            try:
+                if step is None:
+                    raise ValueError('\033[31mERROR: *STEP NOT FOUND !!!\033[0m')
+            except ValueError as e:
+                print(e)
+                sys.exit()
+            if case == 0:
+                lines = deck[:step.start()]
+            lines += re.sub(r'^(\*Step,[^\n]*?name=)([^,\n]+)',
+                            lambda match: match.group(1) + match.group(2).strip() + '-case-' + str(case),
+                            deck[step.start():],
+                            flags=re.M | re.I)
+
+        with open(inp, 'w') as f:
             f.write(lines)
 
+    def substitute(self,
+                   inp:str,
+                   parameters:dict) -> str:
+        '''
+        Substitute parameters into the template
+
+        Args:
+            inp: str, input file name, used to locate the include file
+            parameters: dict, parameters to be written
+
+        Returns:
+            lines: str, input file content
+        '''
+
+        # Render compiled template
+        if self.segments is not None:
+            return self.render(inp, parameters)
+
+        # Read template
+        with open(self.inp_template, 'r') as f:
+            lines = f.read()
+
+        for key, value in parameters.items():
+            if key not in lines:
+                print('\033[33mWARNING: %s NOT FOUND\033[0m' % key.upper())
+            lines = lines.replace(key, str(value))
+
+        return lines
+
+    def render(self,
+               inp:str,
+               parameters:dict) -> str:
+        '''
+        Render compiled template
+
+        Args:
+            inp: str, input file name, used to locate the include file
+            parameters: dict, parameters to be written
+
+        Returns:
+            lines: str, input file content
+        '''
+
+        segments = list(self.segments)
+        if self.include is not None:
+            segments[1] = '*Include, input=' + os.path.relpath(self.include, os.path.dirname(inp) or '.') + '\n'
+        for index, key in self.slots:
+            if key in parameters:
+                segments[index] = str(parameters[key])
+
+        return ''.join(segments)
+
 if __name__ == '__main__':
     # Test inp_writer
     print('\033[7m{:=^50s}\033[0m'.format(' INP WRITER'))
@@ -74,7 +242,7 @@ if __name__ == '__main__':
     print('Input file template:', inp_template)
     inp = 'test.inp'
     print('Input file:', inp)
-    parameters = {'youngs_modulus': '1.0', 
+    parameters = {'youngs_modulus': '1.0',
                   'poisson_ratio': '0.475'}
     print('Parameters:', parameters)
 
@@ -82,4 +250,14 @@ if __name__ == '__main__':
     print('{:-^50s}'.format(' TEST START '))
     inp_writer = InpWriter(inp_template=inp_template)
     inp_writer.write(inp, parameters)
-    print('{:-^50s}'.format(' TEST PASSED '))
\ No newline at end of file
+
+    # Write input file with compiled template
+    inp_writer.compile(keys=list(parameters.keys()),
+                       include='test_model.inp')
+    inp_writer.write(inp, parameters)
+
+    # Write input file packing two load cases
+    inp_writer.write_packed(inp, [{**parameters, 'u1': '1.0'}, {**parameters, 'u1': '2.0'}])
+    with open(inp, 'r') as f:
+        print('Steps:', re.findall(r'^\*Step, name=([^,\n]+)', f.read(), re.M))
+    print('{:-^50s}'.format(' TEST PASSED '))
@@ -0,0 +1,444 @@
+# -*- coding=utf-8 -*-
+
+# ------------------------------------------------------------------
+# File Name:        job_scheduler.py
+# Author:           agent
+# Version:          1.2.0
+# Created:          2026/10/17
+# Description:      This is a script to schedule jobs on a fixed
+#                   number of solver slots under a CPU budget.
+#                   Support per-job timeouts.
+#                   Support fair share between job owners.
+# Function List:    None
+# History:
+#       <author>        <version>       <time>      <desc>
+#       agent           1.0.0           2026/10/17  Created file
+#       agent           1.1.0           2026/10/17  Add timeouts
+#       agent           1.2.0           2026/10/17  Add fair share
+# ------------------------------------------------------------------
+
+import os
+import sys
+import time
+import signal
+import threading
+import subprocess as sp
+from collections import deque
+
+class Job:
+    def __init__(self,
+                 name:str,
+                 command:str,
+                 cwd:str='.',
+                 cpus:int=1,
+                 group:str=None,
+                 tag=None,
+                 timeout:float=None,
+                 owner:str=None) -> None:
+        '''
+        Job class
+        This class is designed to hold a command and its state in the scheduler.
+
+        Args:
+            name: str, job name
+            command: str, shell command
+            cwd: str, working directory
+            cpus: int, number of cpus used by the job
+            group: str, job group, e.g. the trial the job belongs to
+            tag: any, user data attached to the job
+            timeout: float, wall-clock limit of the running job in seconds, default unlimited
+            owner: str, job owner, e.g. the study the job belongs to
+        '''
+
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.cpus = cpus
+        self.group = group
+        self.tag = tag
+        self.timeout = timeout
+        self.timed_out = False
+        self.owner = owner
+        self.process = None
+        self.returncode = None
+        self.submit_time = time.time()
+        self.start_time = None
+        self.end_time = None
+
+class JobScheduler:
+    def __init__(self,
+                 cpu_budget:int=None,
+                 max_jobs:int=None,
+                 poll_interval:float=0.1) -> None:
+        '''
+        Job scheduler class
+        This class is designed to keep a fixed number of job slots busy.
+        A queued job is started as soon as a running job finishes and
+        enough cpus of the budget are free, without waiting for a batch.
+        Owners sharing the scheduler, e.g. the studies of a campaign, get the
+        cpus in proportion to their weights once they are registered with share.
+
+        Args:
+            cpu_budget: int, total number of cpus shared by all jobs, default all cpus
+            max_jobs: int, maximum number of concurrent jobs, default unlimited
+            poll_interval: float, polling interval in seconds
+        '''
+
+        self.cpu_budget = cpu_budget if cpu_budget is not None else os.cpu_count()
+        self.max_jobs = max_jobs
+        self.poll_interval = poll_interval
+        self.queue = deque()
+        self.running = list()
+        self.finished = list()
+        self.shares = dict()
+        self.lock = threading.RLock()
+
+        # Check if the input parameters are valid
+        try:
+            if self.cpu_budget < 1:
+                raise ValueError('\033[31mERROR: CPU BUDGET IS NOT VALID !!!\033[0m')
+            if self.max_jobs is not None and self.max_jobs < 1:
+                raise ValueError('\033[31mERROR: MAX JOBS IS NOT VALID !!!\033[0m')
+        except ValueError as e:
+            print(e)
+            sys.exit()
+
+    @property
+    def used_cpus(self) -> int:
+        return sum(job.cpus for job in self.running)
+
+    def share(self,
+              owner:str,
+              weight:float=1.0,
+              max_cpus:int=None,
+              max_jobs:int=None) -> None:
+        '''
+        Register a job owner for fair share
+
+        Args:
+            owner: str, job owner
+            weight: float, priority of the owner, its share of the cpus is proportional to it
+            max_cpus: int, maximum number of cpus used by the jobs of the owner, default unlimited
+            max_jobs: int, maximum number of concurrent jobs of the owner, default unlimited
+        '''
+
+        # Check if the input parameters are valid
+        try:
+            if weight <= 0:
+                raise ValueError('\033[31mERROR: WEIGHT IS NOT VALID !!!\033[0m')
+        except ValueError as e:
+            print(e)
+            sys.exit()
+
+        with self.lock:
+            self.shares[owner] = (weight, max_cpus, max_jobs)
+            self._start()
+
+    def submit(self,
+               name:str,
+               command:str,
+               cwd:str='.',
+               cpus:int=1,
+               group:str=None,
+               tag=None,
+               timeout:float=None,
+               owner:str=None) -> Job:
+        '''
+        Submit job
+
+        Args:
+            name: str, job name
+            command: str, shell command
+            cwd: str, working directory
+            cpus: int, number of cpus used by the job
+            group: str, job group
+            tag: any, user data attached to the job
+            timeout: float, wall-clock limit of the running job in seconds, default unlimited
+            owner: str, job owner
+
+        Returns:
+            job: Job, submitted job
+        '''
+
+        job = Job(name=name,
+                  command=command,
+                  cwd=cwd,
+                  cpus=cpus,
+                  group=group,
+                  tag=tag,
+                  timeout=timeout,
+                  owner=owner)
+        with self.lock:
+            self.queue.append(job)
+            self._start()
+
+        return job
+
+    def _start(self) -> None:
+        '''
+        Start queued jobs while slots and cpus are free
+        A job asking for more cpus than the budget is started alone.
+        '''
+
+        while self.queue:
+            job = self._next()
+            if job is None:
+                break
+            if self.max_jobs is not None and len(self.running) >= self.max_jobs:
+                break
+            if self.running and self.used_cpus + job.cpus > self.cpu_budget:
+                break
+            self.queue.remove(job)
+            job.start_time = time.time()
+            job.process = sp.Popen(job.command,
+                                   cwd=job.cwd,
+                                   shell=True,
+                                   stdout=sp.DEVNULL,
+                                   stderr=sp.STDOUT,
+                                   start_new_session=True)
+            self.running.append(job)
+
+    def _next(self) -> Job:
+        '''
+        Next queued job
+        Jobs are taken first in first out within an owner. With shares, the owner
+        using the fewest cpus per unit of weight goes first, among the owners below
+        their limits.
+        '''
+
+        if not self.shares:
+            return self.queue[0]
+        heads = dict()
+        for job in self.queue:
+            heads.setdefault(job.owner, job)
+        best = None
+        for owner, job in heads.items():
+            weight, max_cpus, max_jobs = self.shares.get(owner, (1.0, None, None))
+            running = [other for other in self.running if other.owner == owner]
+            cpus = sum(other.cpus for other in running)
+            if max_jobs is not None and len(running) >= max_jobs:
+                continue
+            if max_cpus is not None and running and cpus + job.cpus > max_cpus:
+                continue
+            key = (cpus / weight, job.submit_time)
+            if best is None or key < best[0]:
+                best = (key, job)
+
+        return best[1] if best is not None else None
+
+    def _kill(self,
+              job:Job) -> None:
+        '''
+        Kill a running job with all of its child processes
+        '''
+
+        if job.process.poll() is not None:
+            return
+        if os.name == 'nt':
+            sp.call('taskkill /F /T /PID ' + str(job.process.pid),
+                    stdout=sp.DEVNULL,
+                    stderr=sp.STDOUT)
+        else:
+            try:
+                os.killpg(os.getpgid(job.process.pid), signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        job.process.wait()
+
+    def poll(self,
+             group:str=None,
+             owner:str=None) -> list:
+        '''
+        Poll running jobs and refill free slots
+        Jobs running longer than their timeout are killed and returned as finished.
+
+        Args:
+            group: str, only return finished jobs of this group, default all groups
+            owner: str, only return finished jobs of this owner, default all owners
+
+        Returns:
+            jobs: list, jobs finished since the last poll
+        '''
+
+        with self.lock:
+            for job in list(self.running):
+                if job.timeout is not None and job.process.poll() is None \
+                    and time.time() - job.start_time > job.timeout:
+                    self._kill(job)
+                    job.timed_out = True
+                if job.process.poll() is not None:
+                    job.returncode = job.process.returncode
+                    job.end_time = time.time()
+                    self.running.remove(job)
+                    self.finished.append(job)
+            self._start()
+
+            jobs = [job for job in self.finished if (group is None or job.group == group)
+                    and (owner is None or job.owner == owner)]
+            self.finished = [job for job in self.finished if job not in jobs]
+
+        return jobs
+
+    def cancel(self,
+               group:str,
+               owner:str=None) -> list:
+        '''
+        Cancel jobs
+        Queued jobs of the group are dropped and running ones are killed.
+        Cancelled jobs are not returned by poll.
+
+        Args:
+            group: str, job group
+            owner: str, only cancel jobs of this owner, default all owners
+
+        Returns:
+            jobs: list, cancelled jobs
+        '''
+
+        match = lambda job: job.group == group and (owner is None or job.owner == owner)
+        with self.lock:
+            jobs = [job for job in self.queue if match(job)]
+            self.queue = deque(job for job in self.queue if not match(job))
+            for job in [job for job in self.running if match(job)]:
+                self._kill(job)
+                job.returncode = job.process.returncode
+                job.end_time = time.time()
+                self.running.remove(job)
+                jobs.append(job)
+            self.finished = [job for job in self.finished if not match(job)]
+            self._start()
+
+        return jobs
+
+    def shutdown(self,
+                 owner:str=None) -> list:
+        '''
+        Shut down jobs
+        Queued jobs are dropped and running ones are killed with their process groups.
+        Jobs run in their own sessions and do not receive Ctrl-C, so they are shut down
+        whenever the caller stops.
+
+        Args:
+            owner: str, only shut down jobs of this owner, default all owners
+
+        Returns:
+            jobs: list, shut down jobs
+        '''
+
+        match = lambda job: owner is None or job.owner == owner
+        with self.lock:
+            jobs = [job for job in self.queue if match(job)]
+            self.queue = deque(job for job in self.queue if not match(job))
+            for job in [job for job in self.running if match(job)]:
+                self._kill(job)
+                job.returncode = job.process.returncode
+                job.end_time = time.time()
+                self.running.remove(job)
+                jobs.append(job)
+            self.finished = [job for job in self.finished if not match(job)]
+            self._start()
+
+        return jobs
+
+    def limit(self,
+              timeout,
+              tag=None,
+              owner:str=None) -> None:
+        '''
+        Set the timeouts of queued and running jobs
+
+        Args:
+            timeout: callable, returns the timeout of a job in seconds, None for no limit
+            tag: any, only set the timeouts of jobs with this tag, default all jobs
+            owner: str, only set the timeouts of jobs of this owner, default all owners
+        '''
+
+        with self.lock:
+            for job in list(self.queue) + self.running:
+                if (tag is None or job.tag == tag) and (owner is None or job.owner == owner):
+                    job.timeout = timeout(job)
+
+    def pending(self,
+                group:str=None,
+                owner:str=None) -> int:
+        '''
+        Count queued and running jobs
+
+        Args:
+            group: str, only count jobs of this group, default all groups
+            owner: str, only count jobs of this owner, default all owners
+
+        Returns:
+            count: int, number of pending jobs
+        '''
+
+        with self.lock:
+            return len([job for job in list(self.queue) + self.running
+                        if (group is None or job.group == group)
+                        and (owner is None or job.owner == owner)])
+
+    def queued(self,
+               group:str=None,
+               owner:str=None) -> int:
+        '''
+        Count queued jobs
+
+        Args:
+            group: str, only count jobs of this group, default all groups
+            owner: str, only count jobs of this owner, default all owners
+
+        Returns:
+            count: int, number of queued jobs
+        '''
+
+        with self.lock:
+            return len([job for job in self.queue
+                        if (group is None or job.group == group)
+                        and (owner is None or job.owner == owner)])
+
+    def wait(self,
+             group:str=None,
+             owner:str=None):
+        '''
+        Wait for jobs
+        Finished jobs are yielded one by one in completion order.
+
+        Args:
+            group: str, only wait for jobs of this group, default all groups
+            owner: str, only wait for jobs of this owner, default all owners
+
+        Yields:
+            job: Job, finished job
+        '''
+
+        while True:
+            jobs = self.poll(group=group, owner=owner)
+            for job in jobs:
+                yield job
+            if not jobs:
+                if self.pending(group=group, owner=owner) == 0:
+                    break
+                time.sleep(self.poll_interval)
+
+if __name__ == '__main__':
+    # Test job_scheduler
+    print('\033[7m{:=^50s}\033[0m'.format(' JOB SCHEDULER'))
+
+    # Parameters
+    print('{:-^50s}'.format(' INITIALIZATION '))
+    cpu_budget = 4
+    print('CPU budget:', cpu_budget)
+    cpus = 2
+    print('CPUs per job:', cpus)
+
+    # Run jobs
+    print('{:-^50s}'.format(' TEST START '))
+    scheduler = JobScheduler(cpu_budget=cpu_budget)
+    for num, delay in enumerate([0.3, 0.1, 0.2, 0.1, 5]):
+        scheduler.submit(name=str(num),
+                         command='sleep ' + str(delay),
+                         cpus=cpus,
+                         timeout=1.0)
+    for job in scheduler.wait():
+        print('Finished:', job.name, job.returncode, 'Timed out:', job.timed_out)
+    print('{:-^50s}'.format(' TEST PASSED '))
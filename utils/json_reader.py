@@ -3,19 +3,24 @@
 # ------------------------------------------------------------------
 # File Name:        json_reader.py
 # Author:           Han Xudong
-# Version:          1.0.1
+# Version:          1.2.0
 # Created:          2024/02/21
 # Description:      This is a script to read result file from Abaqus.
+#                   Support memory-mapped npy field output.
+#                   Support packed load cases.
 # Function List:    None
 # History:
 #       <author>        <version>       <time>      <desc>
 #       Han Xudong      1.0.0           2024/02/21  Created file
 #       Han Xudong      1.0.1           2024/08/17  Add description
+#       agent           1.1.0           2026/10/17  Add npy format
+#       agent           1.2.0           2026/10/17  Add packed load cases
 # ------------------------------------------------------------------
 
 import os
 import sys
 import json
+import numpy as np
 
 class JsonReader:
     def __init__(self) -> None:
@@ -52,7 +57,56 @@ class JsonReader:
             with open(path + odb.replace('.odb', '.json'), 'r') as f:
                 result = json.load(f)
 
+        return self.resolve(path, result)
+
+    def resolve(self,
+                path:str,
+                result:dict) -> dict:
+        '''
+        Resolve binary outputs
+        Outputs exported in npy format are memory-mapped without copying.
+        Packed load cases {"cases": [result, ...]} are resolved case by case.
+
+        Args:
+            path: str, result path
+            result: dict, result with npy entries {"format": "npy", "labels": file, "values": file}
+
+        Returns:
+            result: dict, result with npy entries replaced by {"labels": array, "values": array}
+        '''
+
+        if isinstance(result.get('cases'), list):
+            result['cases'] = [self.resolve(path, case) for case in result['cases']]
+            return result
+        for key, value in result.items():
+            if isinstance(value, dict) and value.get('format') == 'npy':
+                result[key] = {'labels': np.load(path + value['labels'], mmap_mode='r'),
+                               'values': np.load(path + value['values'], mmap_mode='r')}
+
         return result
+
+    def field(self,
+              result:dict,
+              output:str) -> tuple:
+        '''
+        Get field output as arrays
+        Both the npy format and the json fallback [[label, d0, d1, ...], ...] are supported.
+
+        Args:
+            result: dict, result
+            output: str, output name
+
+        Returns:
+            labels: np.ndarray, node or element labels
+            values: np.ndarray, values, one row per label
+        '''
+
+        value = result[output]
+        if isinstance(value, dict):
+            return value['labels'], value['values']
+        label_values = np.asarray(value, dtype=float)
+
+        return label_values[:, 0].astype(np.int64), label_values[:, 1:]
     
 if __name__ == '__main__':
     # Test json_reader
@@ -3,80 +3,152 @@
 # ------------------------------------------------------------------
 # File Name:        odb_exporter.py
 # Author:           Han Xudong
-# Version:          1.0.1
+# Version:          1.3.0
 # Created:          2024/02/21
 # Description:      This is a script to export result from odb file.
 #                   Support history and field output.
+#                   Support server mode serving export requests.
+#                   Support binary npy format for field output.
+#                   Support packed load cases, one step per case.
 #                   Must be run with Abaqus.
-# Function List:    None
+# Function List:    export_step, export
 # History:
 #       <author>        <version>       <time>      <desc>
 #       Han Xudong      1.0.0           2024/02/21  Created file
 #       Han Xudong      1.0.1           2024/08/17  Restructured
+#       agent           1.1.0           2026/10/17  Add server mode
+#       agent           1.2.0           2026/10/17  Add npy format
+#       agent           1.3.0           2026/10/17  Add packed load cases
 # ------------------------------------------------------------------
 
 from abaqus import *
 from odbAccess import *
 from abaqusConstants import *
+import os
 import sys
 import json
+import numpy as np
 
-# Open odb file
-path = sys.argv[-3]
-file = sys.argv[-2]
-output = sys.argv[-1]
-# Open odb file
-odb = openOdb("../" + path + file)
-# Load output parameters
-params = json.load(open("../templates/output/" + output + ".json", "r"))
-
-# Export result
-result = dict()
-if params["type"] == "history":
-    # Get history output
-    region = odb.steps[str(params["step"])].historyRegions[str(params["region"])]
-
-    for output in params["outputs"]:
-        result[output] = region.historyOutputs[str(output + "  on section " + params["section"])].data[-1][1]
-elif params["type"] == "field":
-    # Get field output
-    field_outputs = odb.steps[params["step"]].frames[-1].fieldOutputs
-    if params["set"] == "node":
-        # Get node set
-        region = odb.rootAssembly.nodeSets[params["region"]]
-    elif params["set"] == "element":
-        # Get element set
-        region = odb.rootAssembly.elementSets[params["region"]]
-    
-    for output in params["outputs"]:
-        values = field_outputs[output].getSubset(region=region).values
-        label_values = list()
-        for value in values:
-            if params["set"] == "node":
-                # Get node label and data
-                label_values.append([value.nodeLabel, 
-                                     value.data[0], 
-                                     value.data[1], 
-                                     value.data[2]])
-            elif params["set"] == "element":
-                # Get element label and data
-                label_values.append([value.elementLabel, 
-                                     value.data[0], 
-                                     value.data[1], 
-                                     value.data[2], 
-                                     value.data[3], 
-                                     value.data[4], 
-                                     value.data[5]])
-        
-        result[output] = label_values
-
-# Export result to json file
-with open("../" + path + file.replace(".odb", ".json"), "w") as f:
-    json.dump(result, 
-              f,
-              sort_keys=True, 
-              indent=4, 
-              separators=(",", ": "))
-
-# Close odb
-odb.close()
\ No newline at end of file
+sys.path.insert(0, os.getcwd())
+from odb_protocol import serve, write_result
+
+def export_step(odb, step, params, path, base):
+    '''
+    Export result of one step
+
+    Args:
+        odb: Odb, opened odb
+        step: str, step name
+        params: dict, output parameters
+        path: str, odb path
+        base: str, prefix of the npy file names
+
+    Returns:
+        result: dict, exported result
+    '''
+
+    result = dict()
+    if params["type"] == "history":
+        # Get history output
+        region = odb.steps[str(step)].historyRegions[str(params["region"])]
+
+        for output in params["outputs"]:
+            result[output] = region.historyOutputs[str(output + "  on section " + params["section"])].data[-1][1]
+    elif params["type"] == "field":
+        # Get field output
+        field_outputs = odb.steps[str(step)].frames[-1].fieldOutputs
+        if params["set"] == "node":
+            # Get node set
+            region = odb.rootAssembly.nodeSets[str(params["region"])]
+        elif params["set"] == "element":
+            # Get element set
+            region = odb.rootAssembly.elementSets[str(params["region"])]
+
+        for output in params["outputs"]:
+            if params.get("format", "json") == "npy":
+                # Get label and data arrays block by block
+                field = field_outputs[str(output)].getSubset(region=region)
+                labels = list()
+                values = list()
+                for block in field.bulkDataBlocks:
+                    if params["set"] == "node":
+                        labels.append(np.array(block.nodeLabels, dtype=np.int64))
+                    elif params["set"] == "element":
+                        labels.append(np.array(block.elementLabels, dtype=np.int64))
+                    values.append(np.array(block.data, dtype=str(params.get("dtype", "float32"))))
+                name = base + "_" + str(output)
+                np.save("../" + path + name + "_labels.npy", np.concatenate(labels))
+                np.save("../" + path + name + "_values.npy", np.concatenate(values))
+                result[output] = {"format": "npy",
+                                  "labels": name + "_labels.npy",
+                                  "values": name + "_values.npy"}
+                continue
+
+            values = field_outputs[str(output)].getSubset(region=region).values
+            label_values = list()
+            for value in values:
+                if params["set"] == "node":
+                    # Get node label and data
+                    label_values.append([value.nodeLabel,
+                                         value.data[0],
+                                         value.data[1],
+                                         value.data[2]])
+                elif params["set"] == "element":
+                    # Get element label and data
+                    label_values.append([value.elementLabel,
+                                         value.data[0],
+                                         value.data[1],
+                                         value.data[2],
+                                         value.data[3],
+                                         value.data[4],
+                                         value.data[5]])
+
+            result[output] = label_values
+
+    return result
+
+def export(path, file, params):
+    '''
+    Export result from odb file
+    Packed load cases are the steps named <step>-case-<k>, exported one by one.
+
+    Args:
+        path: str, odb path
+        file: str, odb file name
+        params: dict, output parameters
+
+    Returns:
+        result: dict, exported result, {"cases": [result of every case]} for packed load cases
+    '''
+
+    # Open odb file
+    odb = openOdb("../" + path + file, readOnly=True)
+
+    # Export result
+    try:
+        prefix = (str(params["step"]) + "-case-").upper()
+        cases = [step for step in odb.steps.keys() if step.upper().startswith(prefix)]
+        if cases:
+            cases.sort(key=lambda step: int(step[len(prefix):]))
+            result = {"cases": [export_step(odb, step, params, path, file.replace(".odb", "_" + step[len(prefix):]))
+                                for step in cases]}
+        else:
+            result = export_step(odb, params["step"], params, path, file.replace(".odb", ""))
+    finally:
+        # Close odb
+        odb.close()
+
+    return result
+
+if sys.argv[-2] == "--server":
+    # Serve export requests, e.g. abaqus cae noGUI=odb_exporter.py -- --server port_file
+    serve(export, sys.argv[-1])
+else:
+    # Export one odb file, e.g. abaqus cae noGUI=odb_exporter.py -- path file output
+    path = sys.argv[-3]
+    file = sys.argv[-2]
+    output = sys.argv[-1]
+    # Load output parameters
+    params = json.load(open("../templates/output/" + output + ".json", "r"))
+    # Export result to json file
+    write_result(path, file, export(path, file, params))
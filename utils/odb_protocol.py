@@ -0,0 +1,139 @@
+# -*- coding=utf-8 -*-
+
+# ------------------------------------------------------------------
+# File Name:        odb_protocol.py
+# Author:           agent
+# Version:          1.1.0
+# Created:          2026/10/17
+# Description:      This is a script to serve export requests over a
+#                   local socket. Kept compatible with the Python 2
+#                   interpreter of Abaqus. Run it with plain Python
+#                   as a stand-in server without Abaqus.
+# Function List:    serve, load_params, stand_in_export
+# History:
+#       <author>        <version>       <time>      <desc>
+#       agent           1.0.0           2026/10/17  Created file
+#       agent           1.1.0           2026/10/17  Add packed load cases
+# ------------------------------------------------------------------
+
+import os
+import sys
+import json
+import socket
+
+def load_params(output, cache):
+    '''
+    Load output parameters
+    The parsed output file is cached, so it is read only once per server.
+
+    Args:
+        output: str, output name
+        cache: dict, parsed output files
+
+    Returns:
+        params: dict, output parameters
+    '''
+
+    if output not in cache:
+        with open("../templates/output/" + output + ".json", "r") as f:
+            cache[output] = json.load(f)
+
+    return cache[output]
+
+def write_result(path, file, result):
+    '''
+    Write result to json file next to the odb file
+
+    Args:
+        path: str, odb path
+        file: str, odb file name
+        result: dict, exported result
+    '''
+
+    with open("../" + path + file.replace(".odb", ".json"), "w") as f:
+        json.dump(result,
+                  f,
+                  sort_keys=True,
+                  indent=4,
+                  separators=(",", ": "))
+
+def serve(export, port_file):
+    '''
+    Serve export requests
+    The server listens on a local port, which is written to port_file.
+    Each request is a json line {"path", "file", "output"} and is answered
+    by a json line {"status", "result"} or {"status", "message"}.
+    The request {"command": "stop"} stops the server.
+
+    Args:
+        export: callable, export(path, file, params) returns the result dict
+        port_file: str, file to publish the port in
+    '''
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    with open(port_file + ".tmp", "w") as f:
+        f.write(str(server.getsockname()[1]))
+    os.rename(port_file + ".tmp", port_file)
+
+    cache = dict()
+    running = True
+    while running:
+        connection = server.accept()[0]
+        rfile = connection.makefile("rb")
+        wfile = connection.makefile("wb")
+        while True:
+            line = rfile.readline()
+            if not line:
+                break
+            request = json.loads(line.decode("utf-8"))
+            if request.get("command") == "stop":
+                running = False
+                break
+            try:
+                params = load_params(request["output"], cache)
+                result = export(request["path"], request["file"], params)
+                write_result(request["path"], request["file"], result)
+                response = {"status": "ok", "result": result}
+            except Exception as e:
+                response = {"status": "error", "message": str(e)}
+            wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+            wfile.flush()
+        rfile.close()
+        wfile.close()
+        connection.close()
+    server.close()
+
+def stand_in_export(path, file, params):
+    '''
+    Export result from a placeholder odb file
+    The placeholder is a json file holding the outputs by name, or the outputs
+    of every step by step name {"steps": {step: outputs}} for packed load cases.
+
+    Args:
+        path: str, odb path
+        file: str, odb file name
+        params: dict, output parameters
+
+    Returns:
+        result: dict, exported result, {"cases": [result of every case]} for packed load cases
+    '''
+
+    with open("../" + path + file, "r") as f:
+        odb = json.load(f)
+
+    if "steps" in odb:
+        prefix = (str(params["step"]) + "-case-").upper()
+        cases = [step for step in odb["steps"].keys() if step.upper().startswith(prefix)]
+        if cases:
+            cases.sort(key=lambda step: int(step[len(prefix):]))
+            return {"cases": [dict((output, odb["steps"][step][output]) for output in params["outputs"])
+                              for step in cases]}
+        odb = odb["steps"][params["step"]]
+
+    return dict((output, odb[output]) for output in params["outputs"])
+
+if __name__ == "__main__":
+    # Stand-in server, e.g. python odb_protocol.py --server port_file
+    serve(stand_in_export, sys.argv[-1])
@@ -0,0 +1,568 @@
+# -*- coding=utf-8 -*-
+
+# ------------------------------------------------------------------
+# File Name:        pipeline.py
+# Author:           agent
+# Version:          1.4.0
+# Created:          2026/10/17
+# Description:      This is a script to stream samples through the
+#                   write, solve, export and read stages.
+#                   Support packing the samples of a group into one job.
+#                   Support auto-tuned cpus per job.
+#                   Support adaptive timeouts and failure reasons.
+#                   Support schedulers shared by several studies.
+# Function List:    None
+# History:
+#       <author>        <version>       <time>      <desc>
+#       agent           1.0.0           2026/10/17  Created file
+#       agent           1.1.0           2026/10/17  Add packed load cases
+#       agent           1.2.0           2026/10/17  Add auto tuner
+#       agent           1.3.0           2026/10/17  Add timeouts
+#       agent           1.4.0           2026/10/17  Add job owner
+# ------------------------------------------------------------------
+
+import time
+import numpy as np
+from collections import deque
+from rich.progress import Progress, BarColumn, TimeRemainingColumn, TimeElapsedColumn
+from .job_scheduler import JobScheduler
+from .export_pool import ExportRequest, ExportPool
+from .result_cache import ResultCache
+from .artifact_manager import ArtifactManager
+from .auto_tuner import AutoTuner
+
+class Sample:
+    def __init__(self,
+                 name:str,
+                 path:str,
+                 parameters:dict,
+                 group:str=None,
+                 tag=None,
+                 key:str=None,
+                 inp_writer=None) -> None:
+        '''
+        Sample class
+        This class is designed to hold one Abaqus job on its way through the pipeline.
+
+        Args:
+            name: str, job name, the input file is path + name + '.inp'
+            path: str, working directory of the job
+            parameters: dict, parameters to be written into the input file
+            group: str, sample group, e.g. the trial the sample belongs to
+            tag: any, user data attached to the sample
+            key: str, result cache key, default not cached
+            inp_writer: InpWriter, input file writer of the sample, default the writer of the pipeline
+        '''
+
+        self.name = name
+        self.path = path
+        self.parameters = parameters
+        self.group = group
+        self.tag = tag
+        self.key = key
+        self.inp_writer = inp_writer
+        self.stage = 'queued'
+        self.result = None
+        self.returncode = None
+        self.failure = None
+        self.submit_time = None
+        self.end_time = None
+        # Time spent in every stage: wait, write, queue, solve, export queue, export and read
+        self.times = dict()
+
+    @property
+    def inp(self) -> str:
+        return self.path + self.name + '.inp'
+
+    @property
+    def odb(self) -> str:
+        return self.name + '.odb'
+
+class Pipeline:
+    def __init__(self,
+                 inp_writer,
+                 json_reader,
+                 output:str,
+                 scheduler:JobScheduler,
+                 export_scheduler:JobScheduler=None,
+                 export_pool:ExportPool=None,
+                 cpus:int=4,
+                 write_ahead:int=None,
+                 result_cache:ResultCache=None,
+                 artifact_manager:ArtifactManager=None,
+                 abaqus:str='abaqus',
+                 packed:bool=False,
+                 auto_tuner:AutoTuner=None,
+                 timeout:float=None,
+                 timeout_factor:float=None,
+                 timeout_percentile:float=95,
+                 timeout_warmup:int=5,
+                 owner:str=None,
+                 progress:bool=True,
+                 export_timeout:float=None) -> None:
+        '''
+        Pipeline class
+        This class is designed to move every sample through the stages on its own:
+        write -> solve -> export -> read.
+        The export and read of one sample overlap with the solves of the others,
+        and input files are written ahead of the solver queue.
+
+        Args:
+            inp_writer: InpWriter, input file writer
+            json_reader: JsonReader, result file reader
+            output: str, output name
+            scheduler: JobScheduler, scheduler of solver jobs
+            export_scheduler: JobScheduler, scheduler of export jobs, default scheduler
+            export_pool: ExportPool, pool of persistent export servers, used instead of export jobs
+            cpus: int, number of cpus per solver job
+            write_ahead: int, maximum number of written input files waiting for a solver slot,
+                default number of solver slots
+            result_cache: ResultCache, cache of exported results, samples with a cached result skip all stages,
+                as do samples submitted with a result
+            artifact_manager: ArtifactManager, releases the scratch files of every sample as soon as it is read
+            abaqus: str, Abaqus command
+            packed: bool, pack the samples of a group into one multi-step job, one step per sample,
+                so the model data is parsed and the solver started once per group
+            auto_tuner: AutoTuner, chooses the cpus of every solver job from the measured solve times instead of cpus
+            timeout: float, wall-clock limit of a solver job per sample in seconds, default unlimited
+            timeout_factor: float, adaptive limit as a multiple of the timeout_percentile of the solve times
+                of the successful samples, once timeout_warmup samples are solved, default not adaptive
+            timeout_percentile: float, percentile of the solve times of the adaptive limit
+            timeout_warmup: int, number of solved samples before the adaptive limit applies
+            owner: str, owner of the jobs, so that schedulers shared by several pipelines only
+                return the jobs of this one
+            progress: bool, show the progress bars
+            export_timeout: float, wall-clock limit of an export job in seconds, default unlimited,
+                the limit of the export servers is set on the export pool
+        '''
+
+        self.inp_writer = inp_writer
+        self.json_reader = json_reader
+        self.output = output
+        self.scheduler = scheduler
+        self.export_scheduler = export_scheduler if export_scheduler is not None else scheduler
+        self.export_pool = export_pool
+        self.cpus = cpus
+        if write_ahead is None:
+            write_ahead = scheduler.max_jobs if scheduler.max_jobs is not None else max(1, scheduler.cpu_budget // cpus)
+        self.write_ahead = write_ahead
+        self.result_cache = result_cache
+        self.cached = list()
+        self.artifact_manager = artifact_manager
+        self.abaqus = abaqus
+        self.packed = packed
+        self.packs = dict()
+        self.auto_tuner = auto_tuner
+        self.timeout = timeout
+        self.timeout_factor = timeout_factor
+        self.timeout_percentile = timeout_percentile
+        self.timeout_warmup = timeout_warmup
+        self.solve_times = deque(maxlen=100)
+        self.owner = owner
+        self.show_progress = progress
+        self.export_timeout = export_timeout
+        self.queue = deque()
+        self.samples = dict()
+        self.progress = None
+        self.tasks = dict()
+
+    def submit(self,
+               sample:Sample) -> None:
+        '''
+        Submit sample
+
+        Args:
+            sample: Sample, sample to be processed
+        '''
+
+        sample.submit_time = time.time()
+        self.queue.append(sample)
+        self.samples[sample.name] = sample
+
+    def _write(self) -> None:
+        '''
+        Write input files ahead of the solver queue
+        '''
+
+        while self.queue and self.scheduler.queued(owner=self.owner) < self.write_ahead:
+            sample = self.queue.popleft()
+            if self._skip(sample):
+                continue
+            samples = [sample]
+            if self.packed and sample.group is not None:
+                # Pull the other samples of the group out of the queue
+                group = [other for other in self.queue if other.group == sample.group]
+                self.queue = deque(other for other in self.queue if other.group != sample.group)
+                samples += [other for other in group if not self._skip(other)]
+            start_time = time.time()
+            inp_writer = sample.inp_writer if sample.inp_writer is not None else self.inp_writer
+            if len(samples) > 1:
+                name = self.pack_name(sample.group)
+                inp_writer.write_packed(sample.path + name + '.inp',
+                                        [other.parameters for other in samples])
+                self.packs[name] = samples
+            else:
+                name = sample.name
+                inp_writer.write(sample.inp,
+                                 sample.parameters)
+            write_time = (time.time() - start_time) / len(samples)
+            for other in samples:
+                other.times['wait'] = start_time - other.submit_time
+                other.times['write'] = write_time
+                other.stage = 'solve'
+            cpus = self.auto_tuner.next_cpus() if self.auto_tuner is not None else self.cpus
+            self.scheduler.submit(name=name,
+                                  command=self.abaqus + ' job=' + name + ' cpus=' + str(cpus) + ' int',
+                                  cwd=sample.path,
+                                  cpus=cpus,
+                                  group=sample.group,
+                                  tag='solve',
+                                  timeout=self._limit(len(samples)),
+                                  owner=self.owner)
+            for _ in samples:
+                self._advance('Writing')
+
+    def _skip(self,
+              sample:Sample) -> bool:
+        if sample.result is None and self.result_cache is not None and sample.key is not None:
+            sample.result = self.result_cache.get(sample.key)
+        if sample.result is None:
+            return False
+        # Skip all stages of a sample with a cached or resumed result
+        sample.stage = 'done'
+        sample.end_time = time.time()
+        del self.samples[sample.name]
+        self.cached.append(sample)
+        for description in ['Writing', 'Running', 'Reading']:
+            self._advance(description)
+
+        return True
+
+    def pack_name(self,
+                  group:str) -> str:
+        '''
+        Job name of the packed samples of a group
+
+        Args:
+            group: str, sample group
+
+        Returns:
+            name: str, job name
+        '''
+
+        return group + '_packed'
+
+    def jobs(self,
+             samples:list) -> list:
+        '''
+        Jobs the samples may run as
+
+        Args:
+            samples: list, samples
+
+        Returns:
+            jobs: list, (path, name) of every job
+        '''
+
+        jobs = [(sample.path, sample.name) for sample in samples]
+        if self.packed:
+            jobs += [(path, self.pack_name(group)) for path, group in
+                     dict.fromkeys((sample.path, sample.group) for sample in samples if sample.group is not None)]
+
+        return jobs
+
+    def step(self) -> list:
+        '''
+        Advance the pipeline by one polling step
+
+        Returns:
+            samples: list, samples whose results were read during this step
+        '''
+
+        self._write()
+
+        jobs = self.scheduler.poll(owner=self.owner)
+        if self.export_pool is not None:
+            jobs += self.export_pool.poll()
+        elif self.export_scheduler is not self.scheduler:
+            jobs += self.export_scheduler.poll(owner=self.owner)
+
+        done = self.cached
+        self.cached = list()
+        for job in jobs:
+            if job.name in self.packs:
+                samples = self.packs[job.name]
+            elif job.name in self.samples:
+                samples = [self.samples[job.name]]
+            else:
+                # Cancelled sample
+                continue
+            sample = samples[0]
+            if isinstance(job, ExportRequest):
+                # Take result streamed back by the export server
+                self._time_export(samples, job)
+                start_time = time.time()
+                result = self.json_reader.resolve(sample.path,
+                                                  job.result)
+                self._read(samples, result, time.time() - start_time)
+                for other in samples:
+                    if not other.result and job.message is not None:
+                        other.failure = job.message
+                self._finish(samples, job.name)
+                done += samples
+            elif job.tag == 'solve':
+                # Export finished solve, queue and solve times of a pack are shared by its samples
+                for other in samples:
+                    other.stage = 'export'
+                    other.returncode = job.returncode
+                    other.times['queue'] = job.start_time - job.submit_time
+                    other.times['solve'] = (job.end_time - job.start_time) / len(samples)
+                if self.auto_tuner is not None:
+                    self.auto_tuner.record(job.cpus,
+                                           sample.times['solve'] if job.returncode == 0 else None)
+                if job.returncode != 0:
+                    # Skip the export of a failed or killed solve
+                    failure = self._failure(sample.path, job)
+                    for other in samples:
+                        other.result = dict()
+                        other.failure = failure
+                        self._advance('Running')
+                    self._finish(samples, job.name)
+                    done += samples
+                    continue
+                self.solve_times.append(sample.times['solve'])
+                if self.timeout_factor is not None:
+                    self.scheduler.limit(lambda job: self._limit(len(self.packs.get(job.name, [None]))),
+                                         tag='solve',
+                                         owner=self.owner)
+                if self.export_pool is not None:
+                    self.export_pool.submit(name=job.name,
+                                            path=sample.path,
+                                            file=job.name + '.odb',
+                                            output=self.output,
+                                            group=sample.group)
+                else:
+                    self.export_scheduler.submit(name=job.name,
+                                                 command=self.abaqus + ' cae noGUI=odb_exporter.py -- ' + sample.path + ' ' + job.name + '.odb ' + self.output,
+                                                 cwd='utils',
+                                                 group=sample.group,
+                                                 tag='export',
+                                                 timeout=self.export_timeout,
+                                                 owner=self.owner)
+                for _ in samples:
+                    self._advance('Running')
+            elif job.tag == 'export':
+                # Read finished export
+                self._time_export(samples, job)
+                start_time = time.time()
+                result = self.json_reader.read(path=sample.path,
+                                               odb=job.name + '.odb')
+                self._read(samples, result, time.time() - start_time)
+                self._finish(samples, job.name)
+                done += samples
+
+        self._write()
+
+        return done
+
+    def _limit(self,
+               count:int=1) -> float:
+        '''
+        Wall-clock limit of a solver job
+
+        Args:
+            count: int, number of samples solved by the job
+
+        Returns:
+            timeout: float, limit in seconds, None if unlimited
+        '''
+
+        timeout = self.timeout
+        if self.timeout_factor is not None and len(self.solve_times) >= self.timeout_warmup:
+            adaptive = self.timeout_factor * float(np.percentile(self.solve_times, self.timeout_percentile))
+            timeout = adaptive if timeout is None else min(timeout, adaptive)
+
+        return timeout * count if timeout is not None else None
+
+    def _failure(self,
+                 path:str,
+                 job) -> str:
+        '''
+        Failure reason of a solver job
+        Errors of the .msg file are taken first, then the last line of the .sta file.
+
+        Args:
+            path: str, working directory
+            job: Job, failed solver job
+
+        Returns:
+            reason: str, failure reason
+        '''
+
+        if job.timed_out:
+            return 'Timeout'
+        errors = list()
+        try:
+            with open(path + job.name + '.msg', 'r', errors='ignore') as f:
+                lines = f.readlines()
+            for num, line in enumerate(lines):
+                if '***ERROR' in line:
+                    # An error message continues until the next blank line
+                    message = [line.strip()]
+                    for next_line in lines[num + 1:num + 5]:
+                        if not next_line.strip():
+                            break
+                        message.append(next_line.strip())
+                    errors.append(' '.join(message))
+        except OSError:
+            pass
+        if errors:
+            return '; '.join(errors[:3])
+        try:
+            with open(path + job.name + '.sta', 'r', errors='ignore') as f:
+                lines = [line.strip() for line in f if line.strip()]
+            if lines:
+                return lines[-1]
+        except OSError:
+            pass
+
+        return 'Exit code ' + str(job.returncode)
+
+    def _time_export(self,
+                     samples:list,
+                     job) -> None:
+        for sample in samples:
+            sample.times['export queue'] = job.start_time - job.submit_time
+            sample.times['export'] = (job.end_time - job.start_time) / len(samples)
+
+    def _read(self,
+              samples:list,
+              result:dict,
+              read_time:float) -> None:
+        if len(samples) == 1:
+            samples[0].result = result
+        else:
+            # Split the result of a pack into its load cases, missing cases have no result
+            cases = result.get('cases') if result else None
+            if not isinstance(cases, list) or len(cases) != len(samples):
+                cases = [dict()] * len(samples)
+            for sample, case in zip(samples, cases):
+                sample.result = case
+        for sample in samples:
+            sample.times['read'] = read_time / len(samples)
+            if not sample.result:
+                sample.failure = 'No result exported'
+
+    def _finish(self,
+                samples:list,
+                name:str) -> None:
+        for sample in samples:
+            self._store(sample)
+            sample.stage = 'done'
+            sample.end_time = time.time()
+            del self.samples[sample.name]
+            self._advance('Reading')
+        self.packs.pop(name, None)
+        self._release(samples[0].path, name)
+
+    def _store(self,
+               sample:Sample) -> None:
+        if self.result_cache is not None and sample.key is not None and sample.result:
+            self.result_cache.put(sample.key,
+                                  sample.result)
+
+    def _release(self,
+                 path:str,
+                 name:str) -> None:
+        if self.artifact_manager is not None:
+            self.artifact_manager.release(path,
+                                          name)
+
+    def cancel(self,
+               group:str) -> None:
+        '''
+        Cancel samples
+        Samples of the group waiting to be written are dropped, and their queued
+        and running jobs are cancelled at once.
+
+        Args:
+            group: str, sample group
+        '''
+
+        self.queue = deque(sample for sample in self.queue if sample.group != group)
+        self.scheduler.cancel(group, owner=self.owner)
+        if self.export_pool is not None:
+            self.export_pool.cancel(group)
+        elif self.export_scheduler is not self.scheduler:
+            self.export_scheduler.cancel(group, owner=self.owner)
+        for name in [name for name, sample in self.samples.items() if sample.group == group]:
+            sample = self.samples.pop(name)
+            sample.stage = 'cancelled'
+            self._release(sample.path, sample.name)
+        for name in [name for name, samples in self.packs.items() if samples[0].group == group]:
+            samples = self.packs.pop(name)
+            self._release(samples[0].path, name)
+
+    def pending(self) -> int:
+        '''
+        Count samples not yet read
+
+        Returns:
+            count: int, number of pending samples
+        '''
+
+        return len(self.samples)
+
+    def _advance(self,
+                 description:str) -> None:
+        if self.progress is not None:
+            self.progress.update(self.tasks[description],
+                                 advance=1)
+
+    def run(self,
+            samples:list,
+            callback=None) -> list:
+        '''
+        Run samples through the pipeline
+
+        Args:
+            samples: list, samples to be processed
+            callback: callable, called with each sample as soon as its result is read
+
+        Returns:
+            samples: list, processed samples with results
+        '''
+
+        for sample in samples:
+            self.submit(sample)
+
+        if not self.show_progress:
+            self._drain(callback)
+            return samples
+
+        with Progress("[progress.description]{task.description}",
+                      BarColumn(),
+                      "[progress.percentage]{task.percentage:>3.0f}%",
+                      TimeRemainingColumn(),
+                      TimeElapsedColumn()) as progress:
+            self.progress = progress
+            self.tasks = {description: progress.add_task(description,
+                                                          total=len(samples))
+                          for description in ['Writing', 'Running', 'Reading']}
+
+            self._drain(callback)
+
+            progress.refresh()
+            self.progress = None
+
+        return samples
+
+    def _drain(self,
+               callback=None) -> None:
+        while self.pending():
+            done = self.step()
+            for sample in done:
+                if callback is not None:
+                    callback(sample)
+            if not done:
+                time.sleep(self.scheduler.poll_interval)
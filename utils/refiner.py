@@ -0,0 +1,232 @@
+# -*- coding=utf-8 -*-
+
+# ------------------------------------------------------------------
+# File Name:        refiner.py
+# Author:           agent
+# Version:          1.0.0
+# Created:          2026/10/17
+# Description:      This is a script to refine parameters with
+#                   Levenberg-Marquardt steps on the residuals,
+#                   using finite-difference Jacobians.
+# Function List:    None
+# History:
+#       <author>        <version>       <time>      <desc>
+#       agent           1.0.0           2026/10/17  Created file
+# ------------------------------------------------------------------
+
+import sys
+import numpy as np
+
+class Refiner:
+    def __init__(self,
+                 bounds:dict,
+                 step:float=1e-3,
+                 damping:float=1e-2,
+                 dampings:list=None,
+                 tolerance:float=1e-6) -> None:
+        '''
+        Refiner class
+        This class is designed to compute Levenberg-Marquardt steps in the unit box of the
+        parameter bounds. The Jacobian of the residuals is estimated with forward differences,
+        one perturbed point per parameter, and several damped steps are proposed at once,
+        so that both can be simulated as parallel batches.
+
+        Args:
+            bounds: dict, lower and upper bound of every parameter
+            step: float, finite-difference step in the unit box
+            damping: float, initial damping factor
+            dampings: list, multipliers of the damping factor of the proposed steps, default [0.1, 1, 10]
+            tolerance: float, steps shorter than this in the unit box are considered converged
+        '''
+
+        # Check if the input parameters are valid
+        try:
+            if not bounds:
+                raise ValueError('\033[31mERROR: BOUNDS IS EMPTY !!!\033[0m')
+            if not 0 < step < 0.5:
+                raise ValueError('\033[31mERROR: STEP IS NOT VALID !!!\033[0m')
+        except ValueError as e:
+            print(e)
+            sys.exit()
+
+        self.keys = list(bounds.keys())
+        self.lower = np.array([float(bounds[key][0]) for key in self.keys])
+        self.upper = np.array([float(bounds[key][1]) for key in self.keys])
+        self.step = step
+        self.damping = damping
+        self.dampings = dampings if dampings is not None else [0.1, 1.0, 10.0]
+        self.tolerance = tolerance
+
+    def to_unit(self,
+                param_vals:dict) -> np.ndarray:
+        '''
+        Map parameter values to the unit box
+
+        Args:
+            param_vals: dict, parameter values
+
+        Returns:
+            x: np.ndarray, point in the unit box
+        '''
+
+        return (np.array([float(param_vals[key]) for key in self.keys]) - self.lower) / (self.upper - self.lower)
+
+    def from_unit(self,
+                  x:np.ndarray) -> dict:
+        '''
+        Map a point of the unit box to parameter values
+
+        Args:
+            x: np.ndarray, point in the unit box
+
+        Returns:
+            param_vals: dict, parameter values
+        '''
+
+        values = self.lower + np.clip(x, 0.0, 1.0) * (self.upper - self.lower)
+
+        return {key: float(value) for key, value in zip(self.keys, values)}
+
+    def perturb(self,
+                x:np.ndarray) -> tuple:
+        '''
+        Perturbed points of the finite-difference Jacobian
+        The step is taken backward for parameters at their upper bound.
+
+        Args:
+            x: np.ndarray, point in the unit box
+
+        Returns:
+            points: list, one perturbed point per parameter
+            steps: np.ndarray, signed step of every parameter
+        '''
+
+        steps = np.where(x + self.step <= 1.0, self.step, -self.step)
+        points = [x + steps[i] * np.eye(len(x))[i] for i in range(len(x))]
+
+        return points, steps
+
+    def jacobian(self,
+                 residuals:np.ndarray,
+                 perturbed:list,
+                 steps:np.ndarray) -> np.ndarray:
+        '''
+        Finite-difference Jacobian
+        Columns of failed perturbed points are zero.
+
+        Args:
+            residuals: np.ndarray, residuals at the point, shape (residuals,)
+            perturbed: list, residuals at every perturbed point
+            steps: np.ndarray, signed step of every parameter
+
+        Returns:
+            jacobian: np.ndarray, shape (residuals, parameters)
+        '''
+
+        jacobian = np.stack([(np.asarray(r) - residuals) / h for r, h in zip(perturbed, steps)], axis=1)
+
+        return np.nan_to_num(jacobian, nan=0.0, posinf=0.0, neginf=0.0)
+
+    def propose(self,
+                x:np.ndarray,
+                residuals:np.ndarray,
+                jacobian:np.ndarray) -> tuple:
+        '''
+        Propose damped steps
+        Each step solves (J^T J + lambda diag(J^T J)) dx = -J^T r and is clipped to the unit box.
+
+        Args:
+            x: np.ndarray, point in the unit box
+            residuals: np.ndarray, residuals at the point
+            jacobian: np.ndarray, Jacobian at the point
+
+        Returns:
+            points: list, proposed points
+            dampings: list, damping factor of every proposed point
+        '''
+
+        hessian = jacobian.T @ jacobian
+        gradient = jacobian.T @ residuals
+        scale = np.maximum(np.diag(hessian), 1e-12)
+        points = list()
+        dampings = list()
+        for multiplier in self.dampings:
+            damping = self.damping * multiplier
+            try:
+                dx = np.linalg.solve(hessian + damping * np.diag(scale), -gradient)
+            except np.linalg.LinAlgError:
+                continue
+            points.append(np.clip(x + dx, 0.0, 1.0))
+            dampings.append(damping)
+
+        return points, dampings
+
+    def update(self,
+               damping:float=None) -> None:
+        '''
+        Update the damping factor
+        An accepted step decreases it, a rejected batch of steps increases it.
+
+        Args:
+            damping: float, damping factor of the accepted step, None if all steps were rejected
+        '''
+
+        if damping is not None:
+            self.damping = damping / 10
+        else:
+            self.damping = self.damping * 10 * max(self.dampings)
+
+    def converged(self,
+                  x:np.ndarray,
+                  points:list) -> bool:
+        '''
+        Check convergence
+
+        Args:
+            x: np.ndarray, point in the unit box
+            points: list, proposed points
+
+        Returns:
+            converged: bool, whether all proposed steps are shorter than the tolerance
+        '''
+
+        return all(np.linalg.norm(point - x) < self.tolerance for point in points) or self.damping > 1e8
+
+if __name__ == '__main__':
+    # Test refiner
+    print('\033[7m{:=^50s}\033[0m'.format(' REFINER'))
+
+    # Parameters
+    print('{:-^50s}'.format(' INITIALIZATION '))
+    bounds = {"youngs_modulus": [0.05, 0.5], "poisson_ratio": [0.35, 0.47]}
+    print('Bounds:', bounds)
+    target = {"youngs_modulus": 0.2, "poisson_ratio": 0.42}
+    print('Target:', target)
+    inputs = np.array([1.0, -2.0, 3.0])
+
+    def model(param_vals):
+        shear = param_vals["youngs_modulus"] / (2 * (1 + param_vals["poisson_ratio"]))
+        bulk = param_vals["youngs_modulus"] / (3 * (1 - 2 * param_vals["poisson_ratio"]))
+        return np.concatenate([shear * inputs, bulk * inputs])
+
+    # Refine from a point near the target
+    print('{:-^50s}'.format(' TEST START '))
+    refiner = Refiner(bounds=bounds)
+    x = refiner.to_unit({"youngs_modulus": 0.25, "poisson_ratio": 0.4})
+    residuals = model(refiner.from_unit(x)) - model(target)
+    for iteration in range(20):
+        points, steps = refiner.perturb(x)
+        jacobian = refiner.jacobian(residuals, [model(refiner.from_unit(point)) - model(target) for point in points], steps)
+        points, dampings = refiner.propose(x, residuals, jacobian)
+        if refiner.converged(x, points):
+            break
+        errs = [np.sum((model(refiner.from_unit(point)) - model(target)) ** 2) for point in points]
+        if min(errs) < np.sum(residuals ** 2):
+            x = points[int(np.argmin(errs))]
+            residuals = model(refiner.from_unit(x)) - model(target)
+            refiner.update(dampings[int(np.argmin(errs))])
+        else:
+            refiner.update()
+    print('Iterations:', iteration)
+    print('Refined:', refiner.from_unit(x))
+    print('{:-^50s}'.format(' TEST PASSED '))
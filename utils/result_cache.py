@@ -0,0 +1,271 @@
+# -*- coding=utf-8 -*-
+
+# ------------------------------------------------------------------
+# File Name:        result_cache.py
+# Author:           agent
+# Version:          1.0.0
+# Created:          2026/10/17
+# Description:      This is a script to cache exported results on
+#                   disk by the content of the simulation inputs.
+# Function List:    None
+# History:
+#       <author>        <version>       <time>      <desc>
+#       agent           1.0.0           2026/10/17  Created file
+# ------------------------------------------------------------------
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import threading
+import numpy as np
+try:
+    from .json_reader import JsonReader
+except ImportError:
+    from json_reader import JsonReader
+
+class ResultCache:
+    def __init__(self,
+                 path:str='data/cache/',
+                 tolerance:float=1e-6,
+                 max_size:int=None,
+                 max_entries:int=None) -> None:
+        '''
+        Result cache class
+        This class is designed to reuse exported results of identical simulations.
+        The key is a hash of the template content, the output file content,
+        the sample input and the parameters quantized to the tolerance.
+        The least recently used entries are evicted beyond the size limits.
+
+        Args:
+            path: str, cache directory
+            tolerance: float, quantization step of parameter values
+            max_size: int, maximum total size of the entries in bytes, default unlimited
+            max_entries: int, maximum number of entries, default unlimited
+        '''
+
+        # Check if the input parameters are valid
+        try:
+            if tolerance <= 0:
+                raise ValueError('\033[31mERROR: TOLERANCE IS NOT VALID !!!\033[0m')
+        except ValueError as e:
+            print(e)
+            sys.exit()
+
+        self.path = path
+        self.tolerance = tolerance
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.digests = dict()
+        self.json_reader = JsonReader()
+        self.lock = threading.Lock()
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+
+    def digest(self,
+               file:str) -> str:
+        '''
+        Hash file content
+        The digest is kept until the file is modified.
+
+        Args:
+            file: str, file name
+
+        Returns:
+            digest: str, sha256 of the file content
+        '''
+
+        stat = os.stat(file)
+        if file not in self.digests or self.digests[file][0] != (stat.st_mtime, stat.st_size):
+            with open(file, 'rb') as f:
+                self.digests[file] = ((stat.st_mtime, stat.st_size), hashlib.sha256(f.read()).hexdigest())
+
+        return self.digests[file][1]
+
+    def key(self,
+            template:str,
+            output:str,
+            inputs:dict,
+            parameters:dict,
+            packed:bool=False) -> str:
+        '''
+        Build cache key
+
+        Args:
+            template: str, input file template
+            output: str, output file
+            inputs: dict, sample input
+            parameters: dict, parameter values
+            packed: bool, whether the sample is solved as one step of a packed multi-step job
+
+        Returns:
+            key: str, cache key
+        '''
+
+        content = json.dumps({'template': self.digest(template),
+                              'output': self.digest(output),
+                              'inputs': inputs,
+                              'parameters': {key: round(float(value) / self.tolerance)
+                                             for key, value in parameters.items()},
+                              'packed': packed},
+                             sort_keys=True)
+
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _file(self,
+              key:str) -> str:
+        return os.path.join(self.path, key[:2], key + '.json')
+
+    def get(self,
+            key:str) -> dict:
+        '''
+        Get cached result
+
+        Args:
+            key: str, cache key
+
+        Returns:
+            result: dict, cached result, None if missing
+        '''
+
+        file = self._file(key)
+        try:
+            with open(file, 'r') as f:
+                result = self.json_reader.resolve(os.path.dirname(file) + os.sep,
+                                                  json.load(f))
+            os.utime(file)
+        except (OSError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+
+        return result
+
+    def put(self,
+            key:str,
+            result:dict) -> None:
+        '''
+        Put result into cache
+
+        Field outputs given as arrays are stored as npy files next to the entry.
+
+        Args:
+            key: str, cache key
+            result: dict, exported result
+        '''
+
+        file = self._file(key)
+        if not os.path.exists(os.path.dirname(file)):
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+        entry = dict()
+        for output, value in result.items():
+            if isinstance(value, dict) and isinstance(value.get('values'), np.ndarray):
+                entry[output] = {'format': 'npy'}
+                for name in ['labels', 'values']:
+                    entry[output][name] = key + '_' + output + '_' + name + '.npy'
+                    np.save(os.path.join(os.path.dirname(file), entry[output][name]), value[name])
+            else:
+                entry[output] = value
+        with open(file + '.' + str(os.getpid()) + '.tmp', 'w') as f:
+            json.dump(entry, f)
+        os.replace(file + '.' + str(os.getpid()) + '.tmp', file)
+        self.evict()
+
+    def entries(self) -> list:
+        '''
+        List cache entries
+
+        Returns:
+            entries: list, (last use time, size, json file) of every entry, least recently used first
+        '''
+
+        entries = dict()
+        for folder in os.listdir(self.path):
+            if not os.path.isdir(os.path.join(self.path, folder)):
+                continue
+            for file in os.listdir(os.path.join(self.path, folder)):
+                if file.endswith('.tmp'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.path, folder, file))
+                except OSError:
+                    continue
+                key = file.split('.')[0].split('_')[0]
+                entry = entries.setdefault(key, [0.0, 0, os.path.join(self.path, folder, key + '.json')])
+                if file.endswith('.json'):
+                    entry[0] = stat.st_mtime
+                entry[1] += stat.st_size
+
+        return sorted(tuple(entry) for entry in entries.values())
+
+    def evict(self) -> None:
+        '''
+        Evict least recently used entries beyond the size limits
+        '''
+
+        if self.max_size is None and self.max_entries is None:
+            return
+        entries = self.entries()
+        size = sum(entry[1] for entry in entries)
+        while entries and ((self.max_entries is not None and len(entries) > self.max_entries)
+                           or (self.max_size is not None and size > self.max_size)):
+            _, entry_size, file = entries.pop(0)
+            key = os.path.basename(file).split('.')[0]
+            for name in os.listdir(os.path.dirname(file)):
+                if name.split('.')[0].split('_')[0] == key:
+                    try:
+                        os.remove(os.path.join(os.path.dirname(file), name))
+                    except OSError:
+                        pass
+            size -= entry_size
+
+    def stats(self) -> dict:
+        '''
+        Cache statistics
+
+        Returns:
+            stats: dict, hits, misses, hit rate, entries and size in bytes
+        '''
+
+        entries = self.entries()
+
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit rate': self.hits / max(1, self.hits + self.misses),
+                'entries': len(entries),
+                'size': sum(entry[1] for entry in entries)}
+
+if __name__ == '__main__':
+    # Test result_cache
+    print('\033[7m{:=^50s}\033[0m'.format(' RESULT CACHE'))
+
+    # Parameters
+    print('{:-^50s}'.format(' INITIALIZATION '))
+    path = 'data/cache_test/'
+    print('Cache path:', path)
+    template = 'templates/inp/cylinder_linear.inp'
+    print('Input file template:', template)
+    output = 'templates/output/integrated_force.json'
+    print('Output file:', output)
+    inputs = {'u1': 1.0}
+    parameters = {'youngs_modulus': 0.1, 'poisson_ratio': 0.45}
+    print('Parameters:', parameters)
+
+    # Put and get result
+    print('{:-^50s}'.format(' TEST START '))
+    result_cache = ResultCache(path=path,
+                               max_entries=1)
+    key = result_cache.key(template, output, inputs, parameters)
+    print('Miss:', result_cache.get(key) is None)
+    result_cache.put(key, {'SOF1': 1.0})
+    print('Hit:', result_cache.get(result_cache.key(template, output, inputs, {'youngs_modulus': 0.1 + 1e-9, 'poisson_ratio': 0.45})))
+    result_cache.put(result_cache.key(template, output, inputs, {'youngs_modulus': 0.2, 'poisson_ratio': 0.45}), {'SOF1': 2.0})
+    print('Evicted:', result_cache.get(key) is None)
+    print('Statistics:', result_cache.stats())
+    shutil.rmtree(path)
+    print('{:-^50s}'.format(' TEST PASSED '))
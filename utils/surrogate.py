@@ -0,0 +1,156 @@
+# -*- coding=utf-8 -*-
+
+# ------------------------------------------------------------------
+# File Name:        surrogate.py
+# Author:           agent
+# Version:          1.0.0
+# Created:          2026/10/17
+# Description:      This is a script to predict simulation outputs
+#                   from parameters with radial basis functions.
+# Function List:    None
+# History:
+#       <author>        <version>       <time>      <desc>
+#       agent           1.0.0           2026/10/17  Created file
+# ------------------------------------------------------------------
+
+import sys
+import time
+import numpy as np
+from scipy.interpolate import RBFInterpolator
+
+class Surrogate:
+    def __init__(self,
+                 bounds:dict,
+                 kernel:str='thin_plate_spline',
+                 smoothing:float=1e-6,
+                 min_samples:int=None) -> None:
+        '''
+        Surrogate class
+        This class is designed to predict the outputs of every sample from the parameters.
+        One radial basis function model is fitted per sample and output component,
+        on parameters normalized to [0, 1] by their bounds.
+
+        Args:
+            bounds: dict, parameter bounds, e.g. {'youngs_modulus': [0.05, 0.5]}
+            kernel: str, kernel of scipy.interpolate.RBFInterpolator
+            smoothing: float, smoothing of scipy.interpolate.RBFInterpolator
+            min_samples: int, minimum number of observations before predicting,
+                default 2 * (number of parameters + 1)
+        '''
+
+        # Check if the input parameters are valid
+        try:
+            if not bounds:
+                raise ValueError('\033[31mERROR: BOUNDS IS EMPTY !!!\033[0m')
+        except ValueError as e:
+            print(e)
+            sys.exit()
+
+        self.keys = list(bounds.keys())
+        self.lower = np.array([bounds[key][0] for key in self.keys], dtype=float)
+        self.upper = np.array([bounds[key][1] for key in self.keys], dtype=float)
+        self.kernel = kernel
+        self.smoothing = smoothing
+        self.min_samples = min_samples if min_samples is not None else 2 * (len(self.keys) + 1)
+        self.params = list()
+        self.outputs = list()
+        self.model = None
+        self.shape = None
+        self.fit_time = 0.0
+        self.predict_time = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return len(self.params) >= self.min_samples
+
+    def normalize(self,
+                  params:list) -> np.ndarray:
+        '''
+        Normalize parameters by their bounds
+
+        Args:
+            params: list, parameter dicts
+
+        Returns:
+            x: np.ndarray, normalized parameters, shape (len(params), number of parameters)
+        '''
+
+        x = np.array([[param[key] for key in self.keys] for param in params], dtype=float)
+
+        return (x - self.lower) / (self.upper - self.lower)
+
+    def add(self,
+            params:dict,
+            outputs:np.ndarray) -> None:
+        '''
+        Add observation
+
+        Args:
+            params: dict, parameter values
+            outputs: np.ndarray, outputs, shape (samples, outputs)
+        '''
+
+        outputs = np.asarray(outputs, dtype=float)
+        if not np.all(np.isfinite(outputs)):
+            return
+        self.params.append(params)
+        self.outputs.append(outputs)
+        self.model = None
+
+    def fit(self) -> None:
+        '''
+        Fit the models on all observations
+        '''
+
+        if not self.ready:
+            return
+        start_time = time.time()
+        self.shape = self.outputs[0].shape
+        self.model = RBFInterpolator(self.normalize(self.params),
+                                     np.array([outputs.ravel() for outputs in self.outputs]),
+                                     kernel=self.kernel,
+                                     smoothing=self.smoothing)
+        self.fit_time += time.time() - start_time
+
+    def predict(self,
+                params:list) -> np.ndarray:
+        '''
+        Predict outputs
+
+        Args:
+            params: list, parameter dicts
+
+        Returns:
+            outputs: np.ndarray, predicted outputs, shape (len(params), samples, outputs)
+        '''
+
+        if self.model is None:
+            self.fit()
+        start_time = time.time()
+        outputs = self.model(self.normalize(params)).reshape((len(params),) + self.shape)
+        self.predict_time += time.time() - start_time
+
+        return outputs
+
+if __name__ == '__main__':
+    # Test surrogate
+    print('\033[7m{:=^50s}\033[0m'.format(' SURROGATE'))
+
+    # Parameters
+    print('{:-^50s}'.format(' INITIALIZATION '))
+    bounds = {'youngs_modulus': [0.05, 0.5],
+              'poisson_ratio': [0.35, 0.47]}
+    print('Bounds:', bounds)
+
+    # Fit and predict a linear model
+    print('{:-^50s}'.format(' TEST START '))
+    surrogate = Surrogate(bounds=bounds)
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        params = {key: rng.uniform(*bounds[key]) for key in bounds.keys()}
+        surrogate.add(params, np.array([[params['youngs_modulus'] * 10, params['poisson_ratio']]]))
+    params = {'youngs_modulus': 0.2, 'poisson_ratio': 0.4}
+    print('Prediction:', surrogate.predict([params])[0])
+    print('Fit time:', surrogate.fit_time)
+    print('Predict time:', surrogate.predict_time)
+    print('{:-^50s}'.format(' TEST PASSED '))
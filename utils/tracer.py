@@ -0,0 +1,225 @@
+# -*- coding=utf-8 -*-
+
+# ------------------------------------------------------------------
+# File Name:        tracer.py
+# Author:           agent
+# Version:          1.1.0
+# Created:          2026/10/17
+# Description:      This is a script to trace the stage times of
+#                   samples and trials and summarize them.
+# Function List:    summarize
+# History:
+#       <author>        <version>       <time>      <desc>
+#       agent           1.0.0           2026/10/17  Created file
+#       agent           1.1.0           2026/10/17  Add failure reasons
+# ------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import threading
+import numpy as np
+
+# Stages of a sample in pipeline order, and the stage of a trial
+STAGES = ['wait', 'write', 'queue', 'solve', 'export queue', 'export', 'read', 'score']
+
+class Tracer:
+    def __init__(self,
+                 file:str=None) -> None:
+        '''
+        Tracer class
+        This class is designed to record the stage times of every sample and trial,
+        and stream them as json lines to a trace file.
+
+        Args:
+            file: str, trace file, default records are not written
+        '''
+
+        self.file = file
+        self.lock = threading.Lock()
+
+    def write(self,
+              record:dict) -> None:
+        '''
+        Write record to the trace file
+
+        Args:
+            record: dict, trace record
+        '''
+
+        if self.file is None:
+            return
+        with self.lock:
+            with open(self.file, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+
+    def sample(self,
+               trial:int,
+               sample) -> dict:
+        '''
+        Trace one finished sample
+
+        Args:
+            trial: int, trial number
+            sample: Sample, finished sample
+
+        Returns:
+            record: dict, sample record
+        '''
+
+        record = {'event': 'sample',
+                  'trial': trial,
+                  'name': sample.name,
+                  'skipped': 'solve' not in sample.times,
+                  'returncode': sample.returncode,
+                  'failure': sample.failure,
+                  'submit time': sample.submit_time,
+                  'end time': sample.end_time,
+                  'times': sample.times}
+        self.write(record)
+
+        return record
+
+    def trial(self,
+              trial:int,
+              state:str,
+              value:float,
+              samples:list,
+              score:float=0.0) -> dict:
+        '''
+        Trace one finished trial
+
+        Args:
+            trial: int, trial number
+            state: str, trial state
+            value: float, trial error
+            samples: list, finished samples of the trial
+            score: float, time to score the trial
+
+        Returns:
+            times: dict, total time of every stage over the samples
+        '''
+
+        times = {stage: sum(sample.times.get(stage, 0.0) for sample in samples) for stage in STAGES}
+        times['score'] = score
+        self.write({'event': 'trial',
+                    'trial': trial,
+                    'state': state,
+                    'value': value,
+                    'samples': len(samples),
+                    'end time': time.time(),
+                    'times': times})
+
+        return times
+
+def summarize(file:str) -> dict:
+    '''
+    Summarize a trace file
+
+    Args:
+        file: str, trace file
+
+    Returns:
+        summary: dict, latency percentiles of every stage, exit codes, failure reasons and throughput
+    '''
+
+    # Check if the input parameters are valid
+    try:
+        if not os.path.exists(file):
+            raise FileNotFoundError('\033[31mERROR: TRACE FILE NOT FOUND !!!\033[0m')
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit()
+
+    samples = list()
+    trials = list()
+    with open(file, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record['event'] == 'sample':
+                samples.append(record)
+            elif record['event'] == 'trial':
+                trials.append(record)
+
+    summary = {'stages': dict(),
+               'samples': len(samples),
+               'skipped': sum(record['skipped'] for record in samples),
+               'trials': len(trials),
+               'exit codes': dict(),
+               'failures': dict()}
+    for stage in STAGES:
+        if stage == 'score':
+            times = np.array([record['times']['score'] for record in trials])
+        else:
+            times = np.array([record['times'][stage] for record in samples if stage in record['times']])
+        if times.size:
+            summary['stages'][stage] = {'count': int(times.size),
+                                        'mean': float(np.mean(times)),
+                                        'p50': float(np.percentile(times, 50)),
+                                        'p90': float(np.percentile(times, 90)),
+                                        'p99': float(np.percentile(times, 99)),
+                                        'max': float(np.max(times))}
+    for record in samples:
+        if not record['skipped']:
+            code = str(record['returncode'])
+            summary['exit codes'][code] = summary['exit codes'].get(code, 0) + 1
+        if record.get('failure'):
+            summary['failures'][record['failure']] = summary['failures'].get(record['failure'], 0) + 1
+    if samples:
+        elapsed = max(record['end time'] for record in samples) - min(record['submit time'] for record in samples)
+        summary['elapsed'] = elapsed
+        summary['samples per hour'] = len(samples) / max(elapsed, 1e-9) * 3600
+        summary['trials per hour'] = len(trials) / max(elapsed, 1e-9) * 3600
+
+    return summary
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        # Summarize a trace file, e.g. python utils/tracer.py data/<opt_name>/trace.jsonl
+        summary = summarize(sys.argv[1])
+        print('\033[7m{:=^70s}\033[0m'.format(' TRACE SUMMARY'))
+        print('Samples:', summary['samples'], 'Skipped:', summary['skipped'], 'Trials:', summary['trials'])
+        print('Exit codes:', summary['exit codes'])
+        print('Failures:', summary['failures'])
+        print('{:<14s}{:>8s}{:>10s}{:>10s}{:>10s}{:>10s}{:>10s}'.format('Stage', 'Count', 'Mean', 'P50', 'P90', 'P99', 'Max'))
+        for stage, stats in summary['stages'].items():
+            print('{:<14s}{:>8d}{:>10.3f}{:>10.3f}{:>10.3f}{:>10.3f}{:>10.3f}'.format(stage, stats['count'], stats['mean'],
+                                                                                stats['p50'], stats['p90'],
+                                                                                stats['p99'], stats['max']))
+        if 'elapsed' in summary:
+            print('Elapsed:', summary['elapsed'])
+            print('Samples per hour:', summary['samples per hour'])
+            print('Trials per hour:', summary['trials per hour'])
+        sys.exit()
+
+    # Test tracer
+    print('\033[7m{:=^50s}\033[0m'.format(' TRACER'))
+
+    # Parameters
+    print('{:-^50s}'.format(' INITIALIZATION '))
+    file = 'data/trace_test.jsonl'
+    print('Trace file:', file)
+
+    class Sample:
+        def __init__(self, name, solve):
+            self.name = name
+            self.returncode = 0
+            self.failure = None
+            self.submit_time = time.time()
+            self.end_time = self.submit_time + solve
+            self.times = {'write': 0.01, 'queue': 0.1, 'solve': solve, 'export': 0.5, 'read': 0.001}
+
+    # Trace and summarize a trial
+    print('{:-^50s}'.format(' TEST START '))
+    tracer = Tracer(file=file)
+    samples = [Sample('1_0', 2.0), Sample('1_1', 3.0)]
+    for sample in samples:
+        tracer.sample(0, sample)
+    print('Trial times:', tracer.trial(0, 'COMPLETE', 1.0, samples, score=0.001))
+    print('Summary:', summarize(file))
+    os.remove(file)
+    print('{:-^50s}'.format(' TEST PASSED '))